@@ -0,0 +1,142 @@
+import os
+from functools import lru_cache
+from PIL import Image
+from titles import slugify
+from data import is_fresh
+
+
+THUMBNAIL_DIR = "../images/thumbnails"
+PLACEHOLDER_PATH = "../images/empty.png"
+TEMPLATE_DIRS = ["../images/protected", "../images/unprotected", "../images/Unprotected"]
+PREVIEW_RESAMPLE = Image.BILINEAR
+PREVIEW_CACHE_PATH = "../data/cache/previews/{}_{}"
+
+_slugs = {}
+
+
+def register_slugs(titles, slugs):
+    """ Register the precomputed slugs of titles (e.g., the Title and Slug columns) """
+    _slugs.update(zip(titles, slugs))
+
+
+def get_slug(title):
+    """ Return the registered slug of a title, titles that were not registered are slugified once """
+    slug = _slugs.get(title)
+    if slug is None:
+        slug = _slugs[title] = slugify(title)
+    return slug
+
+
+@lru_cache(maxsize=None)
+def thumbnail_index(directory=THUMBNAIL_DIR):
+    """ Map each slug to its thumbnail file with a single scan of the thumbnail directory """
+    if not os.path.isdir(directory):
+        return {}
+    return {file[:-len(".png")]: os.path.join(directory, file)
+            for file in os.listdir(directory) if file.endswith(".png")}
+
+
+def scaled(value, scale=1):
+    """ Scale a length (in pixels or points) of the full-size posters for a preview """
+    return value if scale == 1 else round(value * scale)
+
+
+def resample_filter(scale=1):
+    """ High quality resampling for full-size posters, a cheaper filter for previews """
+    return Image.ANTIALIAS if scale == 1 else PREVIEW_RESAMPLE
+
+
+def open_image(path, size=None):
+    """ Open an image as RGBA, JPEG files are decoded in draft mode close to size """
+    image = Image.open(path)
+    if size is not None and image.format == "JPEG":
+        image.draft("RGB", size)
+    return image.convert('RGBA')
+
+
+def thumbnail(title, size, scale=1):
+    """ Return the RGBA thumbnail of a title resized to (size, size), scaled by scale for previews
+
+    Every source image is decoded once and every (slug, size) variant is resampled
+    once, after which the cached image is returned. Titles without a thumbnail
+    share the variants of the placeholder image.
+
+    The returned image is shared, so only use it as a source (e.g., to paste) and
+    never draw on it directly.
+    """
+    slug = get_slug(title)
+    if slug not in thumbnail_index():
+        slug = None
+    return resize(slug, scaled(size, scale), resample_filter(scale))
+
+
+@lru_cache(maxsize=256)
+def load_source(slug, draft_size=None):
+    """ Decode the thumbnail of a slug, or the placeholder if slug is None """
+    path = PLACEHOLDER_PATH if slug is None else thumbnail_index()[slug]
+    return open_image(path, draft_size)
+
+
+@lru_cache(maxsize=512)
+def resize(slug, size, resample=Image.ANTIALIAS):
+    """ Resample the thumbnail of a slug to (size, size) """
+    draft_size = None if resample == Image.ANTIALIAS else (size, size)
+    return load_source(slug, draft_size).resize((size, size), resample)
+
+
+@lru_cache(maxsize=None)
+def template_dir():
+    """ The directory with the poster templates, the protected templates are used when available """
+    for directory in TEMPLATE_DIRS:
+        if os.path.isdir(directory):
+            return directory
+    raise FileNotFoundError(f"None of the template directories exist: {', '.join(TEMPLATE_DIRS)}")
+
+
+@lru_cache(maxsize=None)
+def load_template(name, scale=1):
+    """ Decode a poster template once
+
+    Templates that are scaled for previews are also kept in data/cache/previews, so
+    later previews do not need to decode the full-size template at all.
+    """
+    path = os.path.join(template_dir(), name)
+    if scale == 1:
+        return open_image(path)
+
+    cache_path = PREVIEW_CACHE_PATH.format(scale, name)
+    if is_fresh(cache_path, path):
+        return open_image(cache_path)
+
+    width, height = Image.open(path).size
+    size = (scaled(width, scale), scaled(height, scale))
+    image = open_image(path, size).resize(size, PREVIEW_RESAMPLE, reducing_gap=2.0)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    image.save(f"{cache_path}.{os.getpid()}.tmp", format="PNG", compress_level=1)
+    os.replace(f"{cache_path}.{os.getpid()}.tmp", cache_path)
+    return image
+
+
+def template(name, scale=1):
+    """ Return a copy of a poster template (e.g., 'top_40.png') to draw on """
+    return load_template(name, scale).copy()
+
+
+@lru_cache(maxsize=None)
+def load_image(path, size=None, scale=1):
+    """ Decode (and resize) a shared image once, e.g., the score circle """
+    if size is None:
+        return open_image(path)
+    size = scaled(size, scale)
+    draft_size = None if scale == 1 else (size, size)
+    return open_image(path, draft_size).resize((size, size), resample_filter(scale))
+
+
+def clear_cache():
+    """ Forget all indexed, decoded and resized images, e.g., after the thumbnails were updated """
+    template_dir.cache_clear()
+    load_template.cache_clear()
+    load_image.cache_clear()
+    thumbnail_index.cache_clear()
+    load_source.cache_clear()
+    resize.cache_clear()
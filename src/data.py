@@ -1,3 +1,60 @@
+import os
+import pandas as pd
+
+
+IMDB_RAW_PATH = "../data/IMDB/imdb_{}_raw.csv"
+ROTTEN_RAW_PATH = "../data/RottenTomatoes/{}_raw.csv"
+CPI_PATH = "../data/cpi.xlsx"
+OVERRIDES_PATH = "../data/overrides.csv"
+TITLE_ALIASES_PATH = "../data/title_aliases.csv"
+CATALOG_YEARS_PATH = "../data/catalog_years.csv"
+STORE_PATH = "../data/store/{}.parquet"
+SCALERS_PATH = "../data/scalers.json"
+FITTED_SCORES_PATH = "../data/fitted_scores.csv"
+
+
+def raw_input_files():
+    """ All files that are read to create the preprocessed data, including the fitted scaling (if any) """
+    return [IMDB_RAW_PATH.format("disney"), IMDB_RAW_PATH.format("pixar"),
+            ROTTEN_RAW_PATH.format("disney"), ROTTEN_RAW_PATH.format("pixar"),
+            CPI_PATH, OVERRIDES_PATH, TITLE_ALIASES_PATH, CATALOG_YEARS_PATH] + \
+        [path for path in [SCALERS_PATH, FITTED_SCORES_PATH] if os.path.exists(path)]
+
+
+def read_imdb(studio, columns=None):
+    """ Read raw IMDB data from the data store, or from the raw csv if it was not ingested (yet) """
+    return read_stored(f"imdb_{studio}", IMDB_RAW_PATH.format(studio), columns)
+
+
+def read_rotten(studio, columns=None):
+    """ Read raw RottenTomatoes data from the data store, or from the raw csv if it was not ingested (yet) """
+    return read_stored(f"rotten_{studio}", ROTTEN_RAW_PATH.format(studio), columns)
+
+
+def read_cpi():
+    """ Read the yearly CPI table from the data store, or from the raw xlsx if it was not ingested (yet) """
+    path = STORE_PATH.format("cpi")
+    if is_fresh(path, CPI_PATH):
+        return pd.read_parquet(path, memory_map=True)
+    return pd.read_excel(CPI_PATH, names=["Year", "CPI"])
+
+
+def read_stored(name, raw_path, columns=None):
+    """ Read a memory-mapped parquet file of the data store with column projection
+
+    Falls back to the raw csv when the parquet file is missing or older than the csv
+    """
+    path = STORE_PATH.format(name)
+    if is_fresh(path, raw_path):
+        return pd.read_parquet(path, columns=columns, memory_map=True)
+    return pd.read_csv(raw_path, usecols=columns)
+
+
+def is_fresh(path, raw_path):
+    """ Whether the stored file exists and was created after its raw source was last modified """
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(raw_path)
+
+
 def load_disney():
     """ List retrieved from https://en.wikipedia.org/wiki/List_of_Walt_Disney_Animation_Studios_films """
     disney = [
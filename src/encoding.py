@@ -0,0 +1,83 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+
+# Pillow save options per policy, `background` flattens RGBA onto a color and
+# `colors` quantizes to a palette before encoding
+POLICIES = {
+    "png": {"format": "PNG"},
+    "png-fast": {"format": "PNG", "compress_level": 1},
+    "png-optimized": {"format": "PNG", "optimize": True},
+    "png-quantized": {"format": "PNG", "optimize": True, "colors": 256},
+    "webp": {"format": "WEBP", "lossless": True, "quality": 50, "method": 4},
+    "webp-lossy": {"format": "WEBP", "quality": 90, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 90, "optimize": True, "background": (255, 255, 255)},
+}
+EXTENSIONS = {"PNG": "png", "WEBP": "webp", "JPEG": "jpg"}
+
+
+def get_policy(policy):
+    """ Return the save options of a policy name, or the policy itself if it already is a dict """
+    return POLICIES[policy] if isinstance(policy, str) else policy
+
+
+def extension(policy):
+    """ The file extension of the format of a policy """
+    return EXTENSIONS[get_policy(policy)["format"]]
+
+
+def prepare(image, policy):
+    """ Flatten and/or quantize an image as the policy requires """
+    policy = get_policy(policy)
+
+    if policy.get("background") is not None and image.mode in ("RGBA", "LA"):
+        flattened = Image.new("RGB", image.size, policy["background"])
+        flattened.paste(image, mask=image.getchannel("A"))
+        image = flattened
+
+    if policy.get("colors"):
+        image = image.quantize(policy["colors"], method=Image.FASTOCTREE)
+
+    return image
+
+
+def encode(image, policy="png", fp=None):
+    """ Encode an image with a policy to fp (a path or file object)
+
+    Without fp nothing is written to disk and the encoded bytes are returned instead.
+    """
+    policy = get_policy(policy)
+    options = {key: value for key, value in policy.items() if key not in ("background", "colors")}
+    image = prepare(image, policy)
+
+    if fp is None:
+        buffer = io.BytesIO()
+        image.save(buffer, **options)
+        return buffer.getvalue()
+
+    image.save(fp, **options)
+    return fp
+
+
+class Encoder:
+    """ Encode images on background threads while the caller continues rendering
+
+    Pillow releases the GIL while it compresses, so encoding overlaps with the
+    rendering of the next image. Use as a context manager to wait for all images.
+    """
+    def __init__(self, max_workers=2):
+        self.executor = ThreadPoolExecutor(max_workers)
+
+    def submit(self, image, policy="png", fp=None):
+        """ Encode an image in the background, returns a Future of the result of `encode` """
+        return self.executor.submit(encode, image, policy, fp)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,68 @@
+import math
+from functools import lru_cache
+from PIL import ImageFont
+
+
+FONT_PATH = "../font/quicksand_bold.ttf"
+
+
+@lru_cache(maxsize=None)
+def get_font(size, path=FONT_PATH):
+    """ Load a font face at a given size once and share it between all posters """
+    return ImageFont.truetype(path, size)
+
+
+@lru_cache(maxsize=8192)
+def text_width(text, font):
+    """ The (cached) width of a text rendered with font """
+    return font.getsize(text)[0]
+
+
+def fit_text(text, max_width, max_size, min_size, path=FONT_PATH):
+    """ Find the largest font size between min_size and max_size at which text fits in max_width
+
+    The size is found with a binary search over the cached text widths. If the text
+    does not fit above min_size, it is split over two lines at min_size.
+
+    Returns the (possibly split) text, the font size and whether the text was split
+    """
+    if text_width(text, get_font(max_size, path)) <= max_width:
+        return text, max_size, False
+
+    low, high, size = min_size + 1, max_size - 1, None
+    while low <= high:
+        middle = (low + high) // 2
+        if text_width(text, get_font(middle, path)) <= max_width:
+            size, low = middle, middle + 1
+        else:
+            high = middle - 1
+
+    if size is None:
+        return split_text(text), min_size, True
+    return text, size, False
+
+
+def split_text(text):
+    """ Split a text over two lines at its middle word """
+    tokens = text.split(" ")
+    split_length = int(math.floor(len(tokens) / 2))
+    return " ".join(tokens[:split_length]) + "\n" + " ".join(tokens[split_length:])
+
+
+def truncate_text(text, max_width, font):
+    """ Shorten text to the longest prefix that, followed by a '.', fits in max_width
+
+    The truncation point is found with a binary search over the cached text widths.
+    """
+    if text_width(text, font) <= max_width:
+        return text
+
+    low, high, length = 0, len(text) - 2, 0
+    while low <= high:
+        middle = (low + high) // 2
+        if text_width(text[:middle] + ".", font) <= max_width:
+            length, low = middle, middle + 1
+        else:
+            high = middle - 1
+
+    return text[:length] + "."
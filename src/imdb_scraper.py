@@ -1,103 +1,187 @@
-from data import load_disney, load_pixar
-from imdb import IMDb
-import pandas as pd
-
+import threading
+from concurrent.futures import Future
+from data import load_disney, load_pixar, IMDB_RAW_PATH
+from imdb import IMDb, IMDbError
+from scraping import (ResponseCache, RequestScheduler, cached_call, load_existing, stale_titles, merge_records,
+                      scrape_with_checkpoint)
+
+
+COLUMNS = ["Title", "Genres", "Runtimes", "Countries", "Color info", "Aspect ration",
+           "Box office", "Original air date", "Rating", "Votes", "Languages", "Year",
+           "Kind", "Companies", "ID"]
+
+CHECKPOINT_PATH = "../data/cache/imdb_{}.jsonl"
+IMDB_HOST = "www.imdb.com"
+
+# The "main" info set already contains the production companies and every field we store,
+# so the remaining info sets (plot, synopsis, ...) are never requested
+INFO_SETS = ("main",)
+
+
+class CandidateResolver:
+    """ Resolve catalog titles to IMDB records with a pool of workers
+
+    Every movieID is fetched at most once, even when it shows up in the
+    search results of several titles, and once the title itself is confirmed
+    only the candidates that were released earlier are still checked. Search results and
+    movie records are kept in the on-disk response cache and all IMDB requests
+    go through the (rate limiting and retrying) request scheduler.
+    """
+    def __init__(self, max_workers=8, nr_candidates=7, cache=None, scheduler=None):
+        self.max_workers = max_workers
+        self.nr_candidates = nr_candidates
+        self.cache = cache
+        self.scheduler = scheduler or RequestScheduler(pool_size=max_workers)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._records = {}
+
+    def resolve(self, movies, studio):
+        """ Return the rows of all candidates of `movies` that were produced by `studio`
+
+        Rows are streamed to a checkpoint, so an interrupted scrape continues where it stopped
+        """
+        return scrape_with_checkpoint(lambda movie: self.resolve_movie(movie, studio), movies,
+                                      COLUMNS + ["Query"], CHECKPOINT_PATH.format(studio.lower()),
+                                      self.max_workers)
+
+    def resolve_movie(self, title, studio):
+        """ Check the search results of a single title in order until the title is confirmed
+
+        clean_raw_data keeps the earliest movie of a title, so after a confirmation the candidates
+        that were released later are skipped, but earlier ones (e.g., the 1994 Lion King that is
+        listed after its 2019 remake) and candidates without a year are still checked.
+        """
+        rows = []
+        confirmed_year = None
+        for movie_id, year in self.search(title) or []:
+            if confirmed_year is not None and year is not None and year > confirmed_year:
+                continue
 
-def scrape(save=False):
-    """ Scrape pixar and disney movies from IMDB """
-    disney_movies = load_disney()
-    pixar_movies = load_pixar()
-    ia = IMDb()
+            record = self.get_movie(movie_id)
 
-    pixar = scrape_pixar(pixar_movies, ia)
-    disney = scrape_disney(disney_movies, ia)
+            # Check if any company contains the studio in their name
+            if record is None or record["Companies"] is None:
+                continue
 
-    if save:
-        pixar.to_csv("imdb_pixar_raw.csv", index=False)
-        disney.to_csv("imdb_disney_raw.csv", index=False)
+            if any(studio in company for company in record["Companies"]):
+                print(record["Title"])
+                rows.append([record[column] for column in COLUMNS] + [title])
 
-    return pixar, disney
+                if is_confirmed(record, title) and record["Year"] is not None:
+                    confirmed_year = min(record["Year"], confirmed_year or record["Year"])
 
+        return rows
 
-def scrape_pixar(pixar_movies, ia):
-    """ Scrape Pixar movies """
-    df = pd.DataFrame(columns=["Title", "Genres", "Runtimes", "Countries", "Color info", "Aspect ration",
-                               "Box office", "Original air date", "Rating", "Votes", "Languages", "Year",
-                               "Kind", "Companies", "ID"])
-    for pixar_movie in pixar_movies:
+    def search(self, title):
+        """ Return the movieID and year (None if unknown) of the search results of a title """
+        def search_ids():
+            return [(movie.movieID, movie.get("year"))
+                    for movie in self._ia().search_movie(title, results=self.nr_candidates)]
 
-        # The movies from the search results
-        movies = ia.search_movie(pixar_movie, results=7)
+        return cached_call(self.cache, f"imdb:search:years:{self.nr_candidates}:{title}",
+                           self.scheduler.call, IMDB_HOST, search_ids, transient=(IMDbError,))
 
-        for movie in movies:
-            result = ia.get_movie(movie.movieID)
+    def get_movie(self, movie_id):
+        """ Fetch a movie once and share the (pending) result with every thread asking for it """
+        with self._lock:
+            future = self._records.get(movie_id)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._records[movie_id] = future
 
-            # Check if any company contains Pixar in their name
+        if is_owner:
             try:
-                companies = [name['name'] for name in result["production companies"]]
-                is_pixar = [True for company in companies if "Pixar" in company]
-
-                if any(is_pixar):
-                    print(result["title"])
-                    df.loc[len(df)] = [result.get("title"),
-                                       result.get("genres"),
-                                       result.get("runtimes"),
-                                       result.get("countries"),
-                                       result.get("color info"),
-                                       result.get("aspect ratio"),
-                                       result.get("box office"),
-                                       result.get("original air date"),
-                                       result.get("rating"),
-                                       result.get("votes"),
-                                       result.get("languages"),
-                                       result.get("year"),
-                                       result.get("kind"),
-                                       companies,
-                                       movie.movieID]
-
-            except KeyError:
-                continue
-
-    return df
+                future.set_result(cached_call(self.cache, f"imdb:movie:{movie_id}", self.scheduler.call,
+                                              IMDB_HOST, self._fetch_movie, (movie_id,), (IMDbError,)))
+            except Exception as e:
+                future.set_exception(e)
+
+        return future.result()
+
+    def _fetch_movie(self, movie_id):
+        """ Fetch a movie and keep only the fields that are stored """
+        return movie_record(self._ia().get_movie(movie_id, info=INFO_SETS), movie_id)
+
+    def _ia(self):
+        """ IMDb instances keep their own url opener, so each worker thread gets its own """
+        if not hasattr(self._local, "ia"):
+            self._local.ia = IMDb()
+        return self._local.ia
+
+
+def movie_record(result, movie_id):
+    """ Convert an IMDB movie to a plain (json serializable) record with the stored columns """
+    try:
+        companies = [name['name'] for name in result["production companies"]]
+    except KeyError:
+        companies = None
+
+    return {"Title": result.get("title"),
+            "Genres": result.get("genres"),
+            "Runtimes": result.get("runtimes"),
+            "Countries": result.get("countries"),
+            "Color info": result.get("color info"),
+            "Aspect ration": result.get("aspect ratio"),
+            "Box office": result.get("box office"),
+            "Original air date": result.get("original air date"),
+            "Rating": result.get("rating"),
+            "Votes": result.get("votes"),
+            "Languages": result.get("languages"),
+            "Year": result.get("year"),
+            "Kind": result.get("kind"),
+            "Companies": companies,
+            "ID": movie_id}
+
+
+def is_confirmed(record, title):
+    """ A candidate is the title we are looking for if it is an animated movie with exactly that name
+
+    This is the same rule clean_raw_data uses to keep a row, so live-action remakes that are listed
+    before the animated original (e.g., Dumbo or Cinderella) do not stop the search
+    """
+    return (record["Kind"] == "movie" and 'Animation' in (record["Genres"] or [])
+            and str(record["Title"]).lower() == title.lower())
+
+
+def scrape(save=False, max_workers=8, cache=None, incremental=False, max_age_days=None, scheduler=None):
+    """ Scrape pixar and disney movies from IMDB
+
+    Use `cache=ResponseCache(offline=True)` to only use previously scraped responses.
+
+    In incremental mode only the titles that are missing from the previously saved
+    raw data, or that were scraped more than `max_age_days` ago, are fetched and
+    merged back into the existing data.
+    """
+    resolver = CandidateResolver(max_workers=max_workers, cache=cache or ResponseCache(), scheduler=scheduler)
+
+    results = []
+    for studio, movies, scrape_studio in [("pixar", load_pixar(), scrape_pixar),
+                                          ("disney", load_disney(), scrape_disney)]:
+        existing = load_existing(IMDB_RAW_PATH.format(studio)) if incremental else None
+        titles = stale_titles(existing, movies, max_age_days)
+
+        if existing is not None and not titles:
+            results.append(existing)
+        else:
+            results.append(merge_records(existing, scrape_studio(titles, resolver), titles))
+
+    pixar, disney = results
+    resolver.scheduler.report()
 
+    if save:
+        pixar.to_csv(IMDB_RAW_PATH.format("pixar"), index=False)
+        disney.to_csv(IMDB_RAW_PATH.format("disney"), index=False)
 
-def scrape_disney(disney_movies, ia):
-    """ Scrape disney movies """
-    df = pd.DataFrame(columns=["Title", "Genres", "Runtimes", "Countries", "Color info", "Aspect ration",
-                               "Box office", "Original air date", "Rating", "Votes", "Languages", "Year",
-                               "Kind", "Companies", "ID"])
-    for disney_movie in disney_movies:
+    return pixar, disney
 
-        # The movies from the search results
-        movies = ia.search_movie(disney_movie, results=7)
 
-        for movie in movies:
-            result = ia.get_movie(movie.movieID)
+def scrape_pixar(pixar_movies, resolver):
+    """ Scrape Pixar movies """
+    return resolver.resolve(pixar_movies, "Pixar")
 
-            # Check if any company contains Disney in their name
-            try:
-                companies = [name['name'] for name in result["production companies"]]
-                is_disney = [True for company in companies if "Disney" in company]
-
-                if any(is_disney):
-                    print(result["title"])
-                    df.loc[len(df)] = [result.get("title"),
-                                       result.get("genres"),
-                                       result.get("runtimes"),
-                                       result.get("countries"),
-                                       result.get("color info"),
-                                       result.get("aspect ratio"),
-                                       result.get("box office"),
-                                       result.get("original air date"),
-                                       result.get("rating"),
-                                       result.get("votes"),
-                                       result.get("languages"),
-                                       result.get("year"),
-                                       result.get("kind"),
-                                       companies,
-                                       movie.movieID]
-
-            except KeyError:
-                continue
 
-    return df
+def scrape_disney(disney_movies, resolver):
+    """ Scrape disney movies """
+    return resolver.resolve(disney_movies, "Disney")
@@ -0,0 +1,52 @@
+import os
+import ast
+import pandas as pd
+from data import IMDB_RAW_PATH, ROTTEN_RAW_PATH, CPI_PATH, STORE_PATH
+
+
+IMDB_LIST_COLUMNS = ["Genres", "Runtimes", "Countries", "Color info", "Languages", "Companies"]
+IMDB_DTYPES = {"Rating": "float64", "Votes": "Int64", "Year": "Int64"}
+ROTTEN_DTYPES = {"Audience_Score": "Int64", "Audience_Rating": "float64", "Audience_Count": "Int64",
+                 "Critic_Score": "Int64", "Critic_Rating": "float64"}
+
+
+def ingest():
+    """ Convert the raw csv/xlsx inputs into typed parquet files in the data store
+
+    Stringified python lists become real list columns and numbers get proper
+    (nullable) dtypes, so loading the data requires no re-parsing nor openpyxl.
+    """
+    os.makedirs(os.path.dirname(STORE_PATH), exist_ok=True)
+
+    for studio in ["disney", "pixar"]:
+        ingest_imdb(IMDB_RAW_PATH.format(studio)).to_parquet(STORE_PATH.format(f"imdb_{studio}"), index=False)
+        ingest_rotten(ROTTEN_RAW_PATH.format(studio)).to_parquet(STORE_PATH.format(f"rotten_{studio}"), index=False)
+
+    ingest_cpi(CPI_PATH).to_parquet(STORE_PATH.format("cpi"), index=False)
+
+
+def ingest_imdb(path):
+    """ Load and type raw IMDB data """
+    df = pd.read_csv(path, dtype={"ID": str})
+    df = df.loc[:, ~df.columns.str.startswith("Unnamed")]
+
+    for column in IMDB_LIST_COLUMNS:
+        df[column] = df[column].map(lambda value: ast.literal_eval(value) if isinstance(value, str) else None)
+
+    df["ID"] = df["ID"].str.zfill(7)
+    return df.astype(IMDB_DTYPES)
+
+
+def ingest_rotten(path):
+    """ Load and type raw RottenTomatoes data """
+    df = pd.read_csv(path)
+    return df.astype(ROTTEN_DTYPES)
+
+
+def ingest_cpi(path):
+    """ Load the yearly CPI table """
+    return pd.read_excel(path, names=["Year", "CPI"]).astype({"Year": "int64", "CPI": "float64"})
+
+
+if __name__ == "__main__":
+    ingest()
@@ -0,0 +1,110 @@
+import os
+import math
+import hashlib
+from functools import lru_cache
+import PIL
+from PIL import Image, ImageDraw, ImageFont
+from PIL.PngImagePlugin import PngInfo
+from fonts import get_font
+
+
+LABEL_CACHE_DIR = "../data/cache/labels"
+LABEL_CACHE_SIZE = 32 * 1024 * 1024
+PADDING = 16
+
+_persist_dir = None
+
+
+def persist_labels(directory=LABEL_CACHE_DIR, max_size=LABEL_CACHE_SIZE):
+    """ Keep rasterized labels on disk in directory so they are reused in later runs
+
+    The least recently used sprites are removed once the directory exceeds max_size bytes.
+    """
+    global _persist_dir
+    os.makedirs(directory, exist_ok=True)
+    _persist_dir = directory
+    prune_labels(directory, max_size)
+
+
+def prune_labels(directory=LABEL_CACHE_DIR, max_size=LABEL_CACHE_SIZE):
+    """ Remove the least recently used sprites until directory is at most max_size bytes """
+    sprites = []
+    for entry in os.scandir(directory):
+        try:
+            sprites.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+        except FileNotFoundError:
+            continue
+
+    size = sum(sprite[1] for sprite in sprites)
+    for _, sprite_size, path in sorted(sprites):
+        if size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        size -= sprite_size
+
+
+def draw_label(draw, xy, text, font, fill=(0, 0, 0)):
+    """ Draw text at xy exactly like draw.text, but from a cached pre-rasterized sprite
+
+    A sprite is the glyph mask of a (text, font, sub-pixel offset), which is rendered
+    once and then composited with `draw.bitmap`, so the same label on another poster
+    (or another slot) skips text shaping and rasterization entirely.
+    """
+    x, y = xy
+    fraction_x, fraction_y = x % 1, y % 1
+    sprite, (left, top) = label_sprite(text, font.path, font.size, fraction_x, fraction_y)
+    draw.bitmap((int(x - fraction_x) + left, int(y - fraction_y) + top), sprite, fill=fill)
+
+
+@lru_cache(maxsize=2048)
+def label_sprite(text, font_path, size, fraction_x=0.0, fraction_y=0.0):
+    """ Return the glyph mask of a label and its offset to the position of the text """
+    key = hashlib.sha1(repr((text, font_version(font_path), size, fraction_x, fraction_y)).encode("utf-8"))
+    path = os.path.join(_persist_dir, f"{key.hexdigest()}.png") if _persist_dir else None
+
+    if path and os.path.exists(path):
+        try:
+            sprite = Image.open(path)
+            sprite.load()
+            os.utime(path)
+            left, top = map(int, sprite.text["offset"].split(","))
+            return sprite, (left, top)
+        except FileNotFoundError:
+            # Pruned by another process in the meantime
+            pass
+
+    sprite, offset = rasterize_label(text, font_path, size, fraction_x, fraction_y)
+
+    if path:
+        info = PngInfo()
+        info.add_text("offset", f"{offset[0]},{offset[1]}")
+        sprite.save(f"{path}.{os.getpid()}.tmp", format="PNG", pnginfo=info)
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+
+    return sprite, offset
+
+
+@lru_cache(maxsize=None)
+def font_version(font_path):
+    """ Identify the rendering of a font by the hash of the font file and the Pillow and FreeType versions """
+    with open(font_path, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return digest, PIL.__version__, ImageFont.core.freetype2_version
+
+
+def rasterize_label(text, font_path, size, fraction_x=0.0, fraction_y=0.0):
+    """ Render a label on a transparent mask and crop it to the glyphs """
+    font = get_font(size, font_path)
+
+    measure = ImageDraw.Draw(Image.new("L", (1, 1)))
+    left, top, right, bottom = measure.textbbox((fraction_x, fraction_y), text, font=font)
+    left, top = math.floor(min(left, 0)), math.floor(min(top, 0))
+    canvas = Image.new("L", (math.ceil(right) - left + 2 * PADDING, math.ceil(bottom) - top + 2 * PADDING))
+    origin = (PADDING - left, PADDING - top)
+    ImageDraw.Draw(canvas).text((origin[0] + fraction_x, origin[1] + fraction_y), text, fill=255, font=font)
+
+    box = canvas.getbbox() or (0, 0, 1, 1)
+    return canvas.crop(box), (box[0] - origin[0], box[1] - origin[1])
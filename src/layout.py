@@ -0,0 +1,113 @@
+from functools import lru_cache
+from assets import thumbnail, scaled
+from fonts import get_font, fit_text
+from labels import draw_label
+from tiles import new_poster
+
+
+class PosterSpec:
+    """ The layout of a poster that shows groups of titles in a grid
+
+    The groups are drawn on the `template` image from left to right in rows of
+    `columns` groups, every group is `column_width` wide and every row `row_height`
+    high. Within a group the titles are placed `slot_height` apart. `origin` is the position of the first thumbnail (x) and
+    the first text (y) and the text starts `text_offset` pixels right of the thumbnail.
+
+    Titles are fitted in `text_width` between the font sizes in `font_sizes` (max, min).
+    Titles that needed a smaller font are moved down by `shrunk_offset(text, font)` and
+    titles that were split over two lines by `split_offset`.
+    """
+    def __init__(self, template, origin, columns, column_width, row_height, slot_height,
+                 thumbnail_size, text_offset, text_width, font_sizes,
+                 split_offset=0, shrunk_offset=None, new_row_on_smaller_group=False):
+        self.template = template
+        self.origin = origin
+        self.columns = columns
+        self.column_width = column_width
+        self.row_height = row_height
+        self.slot_height = slot_height
+        self.thumbnail_size = thumbnail_size
+        self.text_offset = text_offset
+        self.text_width = text_width
+        self.font_sizes = font_sizes
+        self.split_offset = split_offset
+        self.shrunk_offset = shrunk_offset
+        self.new_row_on_smaller_group = new_row_on_smaller_group
+
+
+@lru_cache(maxsize=None)
+def scale_spec(spec, scale):
+    """ Scale all lengths and font sizes of a spec for a preview (`thumbnail` scales the thumbnail size) """
+    if scale == 1:
+        return spec
+    return PosterSpec(spec.template, (scaled(spec.origin[0], scale), scaled(spec.origin[1], scale)),
+                      spec.columns, scaled(spec.column_width, scale), scaled(spec.row_height, scale),
+                      scaled(spec.slot_height, scale), spec.thumbnail_size, scaled(spec.text_offset, scale),
+                      scaled(spec.text_width, scale), tuple(scaled(size, scale) for size in spec.font_sizes),
+                      split_offset=scaled(spec.split_offset, scale), shrunk_offset=spec.shrunk_offset,
+                      new_row_on_smaller_group=spec.new_row_on_smaller_group)
+
+
+@lru_cache(maxsize=None)
+def compile_layout(spec, group_sizes, scale=1):
+    """ Compute the geometry of every slot once for a spec and the sizes of its groups
+
+    Returns a tuple with the (thumbnail x, thumbnail y, text x, text y) of each title,
+    in the order of the titles in the groups.
+    """
+    spec = scale_spec(spec, scale)
+    slots = []
+    column, row = 0, 0
+
+    for index, group_size in enumerate(group_sizes):
+        image_x = spec.origin[0] + column * spec.column_width
+        text_y = spec.origin[1] + row * spec.row_height
+        for slot in range(group_size):
+            y = text_y + slot * spec.slot_height
+            slots.append((image_x, y - scaled(28, scale), image_x + spec.text_offset, y))
+
+        column += 1
+        if column == spec.columns:
+            row += 1
+            column = 0
+        elif (spec.new_row_on_smaller_group and index != len(group_sizes) - 1
+              and group_sizes[index + 1] < group_size):
+            row += 1
+            column = 0
+
+    return tuple(slots)
+
+
+def render_groups(spec, groups, template_name=None, scale=1, tiled=False):
+    """ Render groups of titles on a copy of template_name, by default the template of the spec
+
+    Previews are rendered with all lengths and font sizes multiplied by scale, a tiled
+    poster is returned as a `tiles.TiledPoster`.
+
+    Returns the poster, the object to draw on it with and the compiled slots so callers can draw
+    additional information (e.g., scores) in the same slots.
+    """
+    pattern, draw = new_poster(template_name or spec.template, scale, tiled)
+    slots = compile_layout(spec, tuple(len(group) for group in groups), scale)
+    titles = [title for group in groups for title in group]
+    spec = scale_spec(spec, scale)
+    max_size, min_size = spec.font_sizes
+
+    for title, (image_x, image_y, text_x, text_y) in zip(titles, slots):
+
+        # Circle
+        title_image = thumbnail(title, spec.thumbnail_size, scale)
+        pattern.paste(title_image, (image_x, image_y), mask=title_image)
+
+        # Shorten text if too long
+        text, size, split = fit_text(title, spec.text_width, max_size, min_size)
+        font = get_font(size)
+
+        if split:
+            text_y += spec.split_offset
+        elif size != max_size and spec.shrunk_offset is not None:
+            text_y += spec.shrunk_offset(text, font)
+
+        draw_label(draw, (text_x, text_y), text, font)
+
+    return pattern, draw, slots
@@ -1,43 +1,126 @@
-from preprocessing import combine_rotten_and_imdb
+import os
+import time
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, Future
+from preprocessed import load_preprocessed
+from assets import register_slugs
+from labels import persist_labels
+from encoding import Encoder, encode, extension
 from tournament import (create_disney_vs_pixar_main,
                         create_all_disney_group_tournament,
-                        create_all_free_for_all_group_tournament,
+                        create_8_groups,
                         create_rank_top_bottom_40,
                         create_disney_free_for_all_group_tournament,
                         create_all_pixar_group_tournament)
 
 
-def main():
-    pixar, disney, total = combine_rotten_and_imdb()
-
-    # Create Images
-    disney_vs_pixar_main = create_disney_vs_pixar_main(pixar, disney)
-    all_disney_group_tournament = create_all_disney_group_tournament(disney)
-    all_pixar_group_tournament = create_all_pixar_group_tournament(pixar)
-    disney_free_for_all_left = create_disney_free_for_all_group_tournament(disney, even=True)
-    disney_free_for_all_right = create_disney_free_for_all_group_tournament(disney, even=False)
-    free_for_all_left, free_for_all_right = create_all_free_for_all_group_tournament(total)
-
-    top_40 = create_rank_top_bottom_40(total.sort_values("Seed_Score", ascending=False).Title.values[:40],
-                                       total.sort_values("Seed_Score", ascending=False).Seed_Score.values[:40],
-                                       total.sort_values("Seed_Score", ascending=False).Year.values[:40],
-                                       top=True)
-
-    bottom_40 = create_rank_top_bottom_40(total.sort_values("Seed_Score", ascending=False).Title.values[40:],
-                                          total.sort_values("Seed_Score", ascending=False).Seed_Score.values[40:],
-                                          total.sort_values("Seed_Score", ascending=False).Year.values[40:],
-                                          top=False)
-
-    # Save results
-    disney_vs_pixar_main.save("../images/results/main.png")
-    all_disney_group_tournament.save("../images/results/all_disney_group_tournament.png")
-    all_pixar_group_tournament.save("../images/results/all_pixar_group_tournament.png")
-    disney_free_for_all_left.save("../images/results/disney_free_for_all_left.png")
-    disney_free_for_all_right.save("../images/results/disney_free_for_all_right.png")
-    free_for_all_left.save("../images/results/free_for_all_left.png")
-    free_for_all_right.save("../images/results/free_for_all_right.png")
-    top_40.save("../images/results/top_40.png")
-    bottom_40.save("../images/results/bottom_40.png")
+RESULTS_PATH = "../images/results/{}.{}"
+PREVIEW_PATH = "../images/results/preview/{}.{}"
+ZOOM_PATH = "../images/results/zoom/{}.dzi"
+
+POSTERS = {
+    "main": lambda frames, **options:
+        create_disney_vs_pixar_main(frames["pixar"], frames["disney"], **options),
+    "all_disney_group_tournament": lambda frames, **options:
+        create_all_disney_group_tournament(frames["disney"], **options),
+    "all_pixar_group_tournament": lambda frames, **options:
+        create_all_pixar_group_tournament(frames["pixar"], **options),
+    "disney_free_for_all_left": lambda frames, **options:
+        create_disney_free_for_all_group_tournament(frames["disney"], even=True, **options),
+    "disney_free_for_all_right": lambda frames, **options:
+        create_disney_free_for_all_group_tournament(frames["disney"], even=False, **options),
+    "free_for_all_left": lambda frames, **options:
+        create_8_groups(list(frames["ranked"].Title.values[::2]), left=True, **options),
+    "free_for_all_right": lambda frames, **options:
+        create_8_groups(list(frames["ranked"].Title.values[1::2]), left=False, **options),
+    "top_40": lambda frames, **options:
+        create_rank_top_bottom_40(*rank_columns(frames["ranked"].iloc[:40]), top=True, **options),
+    "bottom_40": lambda frames, **options:
+        create_rank_top_bottom_40(*rank_columns(frames["ranked"].iloc[40:]), top=False, **options),
+}
+
+_frames = {}
+
+
+def main(max_workers=None, scale=1, tiled=False, policy=None, policies=None):
+    """ Render and save all posters
+
+    The posters are independent, so each one is rendered and saved as a separate job
+    on a pool of `max_workers` processes (by default one per CPU). The frames are
+    sent to each worker once when it starts. Use `max_workers=1` to render all
+    posters in the current process, the posters are then encoded in background threads.
+
+    The posters are encoded with `policy` (see encoding.POLICIES, e.g., "png-optimized",
+    "webp" or "jpeg"), `policies` can set the policy of individual posters by name.
+
+    A scale below 1 (e.g., 0.25) renders quick previews to images/results/preview with
+    scaled geometry and fonts, cheaper resampling and fast PNG compression.
+
+    With tiled=True the posters are composed tile by tile, which bounds the memory per
+    poster by the tile size, and saved as Deep Zoom Images (with PNG tiles) to images/results/zoom.
+    """
+    path = ZOOM_PATH if tiled else RESULTS_PATH if scale == 1 else PREVIEW_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    policy = policy or ("png" if scale == 1 else "png-fast")
+
+    start = time.time()
+    render_posters(list(POSTERS), max_workers, policy, policies, scale=scale, tiled=tiled, save=True)
+    print(f"Rendered {len(POSTERS)} posters in {time.time() - start:.1f}s")
+
+
+def render_bytes(names=None, policy="webp", policies=None, max_workers=None, scale=1):
+    """ Render posters and return their encoded bytes by name without writing anything to disk """
+    names = list(names or POSTERS)
+    return dict(zip(names, render_posters(names, max_workers, policy, policies, scale=scale)))
+
+
+def render_posters(names, max_workers=None, policy="png", policies=None, **options):
+    """ Render the posters with the given names on a pool of processes, see `main` """
+    pixar, disney, total = load_preprocessed()
+    max_workers = min(max_workers or os.cpu_count() or 1, len(names))
+    policies = [(policies or {}).get(name, policy) for name in names]
+
+    if max_workers == 1:
+        init_worker(pixar, disney, total)
+        with Encoder() as encoder:
+            results = [render_poster(name, policy, encoder=encoder, **options)
+                       for name, policy in zip(names, policies)]
+        return [result.result() if isinstance(result, Future) else result for result in results]
+
+    with ProcessPoolExecutor(max_workers, initializer=init_worker, initargs=(pixar, disney, total)) as executor:
+        return list(executor.map(partial(render_poster, **options), names, policies))
+
+
+def init_worker(pixar, disney, total):
+    """ Store the read-only frames of a worker, with the movies ranked by Seed_Score once
+
+    Rasterized labels are shared between the workers (and later runs) through data/cache/labels.
+    """
+    _frames.update(pixar=pixar, disney=disney, total=total,
+                   ranked=total.sort_values("Seed_Score", ascending=False))
+    register_slugs(total.Title, total.Slug)
+    persist_labels()
+
+
+def render_poster(name, policy="png", scale=1, tiled=False, save=False, encoder=None):
+    """ Render a single poster, saved to images/results or returned as encoded bytes
+
+    With an encoder the poster is encoded in the background and a Future is returned.
+    """
+    poster = POSTERS[name](_frames, scale=scale, tiled=tiled)
+    if tiled:
+        poster.save_dzi(ZOOM_PATH.format(name))
+        return ZOOM_PATH.format(name)
+
+    path = (RESULTS_PATH if scale == 1 else PREVIEW_PATH).format(name, extension(policy)) if save else None
+    if encoder is not None:
+        return encoder.submit(poster, policy, path)
+    return encode(poster, policy, path)
+
+
+def rank_columns(ranked):
+    """ The titles, seed scores and years that create_rank_top_bottom_40 expects """
+    return ranked.Title.values, ranked.Seed_Score.values, ranked.Year.values
 
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+import os
+import json
+import hashlib
+import pandas as pd
+from data import raw_input_files
+
+
+CACHE_DIR = "../data/cache/preprocessed"
+SOURCE_FILES = ["preprocessing.py", "ingest.py", "data.py", "titles.py"]
+FRAMES = ["pixar", "disney", "total"]
+
+
+def load_preprocessed(use_cache=True, refit=False, **params):
+    """ Return the pixar, disney and total frames of combine_rotten_and_imdb(**params)
+
+    The frames are cached as parquet files keyed by a fingerprint of the raw input
+    files, the fitted scaling, the preprocessing code and the parameters. Whenever any
+    of those change the frames are recreated, otherwise preprocessing (and importing scipy)
+    is skipped entirely.
+
+    The stored scaling is only refitted (and data/scalers.json overwritten) with refit=True.
+    """
+    frames = None
+    if refit:
+        from preprocessing import combine_rotten_and_imdb
+        frames = combine_rotten_and_imdb(refit=True, **params)
+
+    key = fingerprint(raw_input_files() + SOURCE_FILES, params)
+    paths = [os.path.join(CACHE_DIR, f"{key}_{frame}.parquet") for frame in FRAMES]
+
+    if frames is None:
+        if use_cache and all(os.path.exists(path) for path in paths):
+            return tuple(pd.read_parquet(path) for path in paths)
+
+        from preprocessing import combine_rotten_and_imdb
+        frames = combine_rotten_and_imdb(**params)
+
+    clear_cache()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for df, path in zip(frames, paths):
+        df.to_parquet(path)
+
+    return frames
+
+
+def fingerprint(files, params):
+    """ Hash the contents of files together with the (json serializable) parameters """
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    for path in files:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def clear_cache():
+    """ Remove all cached frames """
+    if os.path.isdir(CACHE_DIR):
+        for file in os.listdir(CACHE_DIR):
+            os.remove(os.path.join(CACHE_DIR, file))
@@ -1,74 +1,147 @@
+import os
 import pandas as pd
+import ast
 import json
-import re 
 import numpy as np
-from sklearn import preprocessing
+from functools import lru_cache
 from scipy.stats import boxcox
-from data import load_disney, load_pixar
+from titles import load_title_index, slugify
+from data import read_imdb, read_rotten, read_cpi, OVERRIDES_PATH, SCALERS_PATH, FITTED_SCORES_PATH
 
 
-def combine_rotten_and_imdb():
+COMPANIES = ["Disney", "Pixar"]
+SCALED_COLUMNS = ["I_Audience_Rating", "R_Audience_Score", "R_Audience_Rating",
+                  "R_Critic_Score", "R_Critic_Rating",
+                  "Cumulative Worldwide Gross", "Opening_Weekend_USA",
+                  "Opening_Weekend_USA_Adjusted", "Yearly_Votes"]
+REFERENCE_YEAR = 2021
+YEARLY_FEATURES = {"Yearly_Gross": "Cumulative Worldwide Gross",
+                   "Yearly_Votes": "I_Audience_Votes"}
+
+
+def combine_rotten_and_imdb(target_year=None, reference_year=REFERENCE_YEAR, refit=False):
     """ Combine and return RottenTomatoes and IMDB datasets 
     
     Preprocessing steps:
         * Adjusts the Opening Weekend USA Box Office for inflation using CPI
-        * Scale variables between 0 and 1 for comparison of values
+          (to the prices of target_year, by default the last year in the CPI table)
+        * Normalize popularity metrics per year since release, as of reference_year
+        * Scale variables between 0 and 1 for comparison of values,
+          both within each studio and over all movies
         * Based on scaled variables, create a seed score
+
+    All steps run once on a single canonical frame sorted by its categorical Company column.
+    The pixar and disney frames are positional slices of that frame with the studio-scoped
+    scores, the total frame contains the scores scaled over all movies.
+
+    Refitting the scaling is an explicit batch job (refit=True), which saves the fitted
+    parameters to data/scalers.json and the scores of every title to data/fitted_scores.csv.
+    Otherwise the titles in data/fitted_scores.csv keep their stored scores and new titles
+    are scored with the stored parameters (see `score_new_titles`), so adding a release does
+    not change the seeds of existing titles. Without stored scores for the same target_year
+    and reference_year everything is fitted, but nothing is saved.
     """
+    df = build_features(target_year, reference_year)
+    params = {"target_year": target_year, "reference_year": reference_year}
+    fitted = None if refit else load_fitted(params)
+
+    if fitted is None:
+        df, scalers = fit_scores(df)
+        if refit:
+            save_fitted(scalers, df, params)
+    else:
+        df = apply_fitted(df, *fitted)
+
+    return studio_view(df, "Pixar"), studio_view(df, "Disney"), overall_view(df)
+
+
+def fit_scores(df):
+    """ Fit the scaling within each studio and over all movies and add the scaled columns and seed scores """
+
+    # Scale variables and extract seed score within each studio
+    scaled, studio_scalers = scale_variables(df, SCALED_COLUMNS, by="Company")
+    df = df.join(scaled)
+    df["Seed_Score"] = create_seed_score(df)
+
+    # Scale variables and extract seed score over all movies
+    scaled, all_scalers = scale_variables(df, SCALED_COLUMNS)
+    df = df.join(scaled.add_suffix("_All"))
+    df["Seed_Score_All"] = create_seed_score(df, suffix="_Scaled_All")
+
+    return df, {**studio_scalers, **all_scalers}
+
+
+def score_columns():
+    """ The columns that are added by fitting or applying the scaling, in order """
+    return ([f"{column}_Scaled" for column in SCALED_COLUMNS] + ["Seed_Score"] +
+            [f"{column}_Scaled_All" for column in SCALED_COLUMNS] + ["Seed_Score_All"])
+
+
+def apply_fitted(df, scalers, scores):
+    """ Add the stored scores of known titles and score the new titles with the stored parameters """
+    known = df.Title.isin(scores.index)
+    scored = df.loc[known].join(scores, on="Title")
+
+    if not known.all():
+        new = score_new_titles(df.loc[~known], scalers=scalers)
+        print(f"Scored {len(new)} new titles with the stored scalers: {', '.join(new.Title)}")
+        scored = pd.concat([scored, new]).reindex(df.index)
+
+    return scored
+
+
+def build_features(target_year=None, reference_year=REFERENCE_YEAR):
+    """ Combine RottenTomatoes and IMDB data into the canonical (unscaled) frame """
     
     # Load rotten and imdb
-    pixar, disney, total = preprocess_imdb_data()
-    pixar_rotten, disney_rotten, total_rotten = preprocess_rotten_data()
+    imdb = preprocess_imdb_data()
+    rotten = preprocess_rotten_data()
     
     # combine rotten and imdb
     columns = ['Title', 'Rating', 'Votes', 'Year', 'Budget',
-               'Cumulative Worldwide Gross', 'Opening_Weekend_USA', 'Yearly_Votes']
-    total = total.loc[:, columns]
-    total = total.rename(columns={'Rating':'I_Audience_Rating',
-                                  'Votes': 'I_Audience_Votes'})
-
-    total_rotten = total_rotten.rename(columns={'Audience_Score':'R_Audience_Score',
-                                                'Audience_Rating': 'R_Audience_Rating',
-                                                'Audience_Count': 'R_Audience_Count',
-                                                'Audience_Rating': 'R_Audience_Rating',
-                                                'Critic_Score': 'R_Critic_Score',
-                                                'Critic_Rating': 'R_Critic_Rating'})
-    total = total.merge(total_rotten, on=['Title']).copy()
-    disney = total.loc[total.Company == "Disney", :].copy()
-    pixar = total.loc[total.Company == "Pixar", :].copy()
-    
+               'Cumulative Worldwide Gross', 'Opening_Weekend_USA']
+    imdb = imdb.loc[:, columns]
+    imdb = imdb.rename(columns={'Rating':'I_Audience_Rating',
+                                'Votes': 'I_Audience_Votes'})
+
+    rotten = rotten.rename(columns={'Audience_Score':'R_Audience_Score',
+                                    'Audience_Rating': 'R_Audience_Rating',
+                                    'Audience_Count': 'R_Audience_Count',
+                                    'Critic_Score': 'R_Critic_Score',
+                                    'Critic_Rating': 'R_Critic_Rating'})
+    df = imdb.merge(rotten, on=['Title'])
+    df["Company"] = pd.Categorical(df.Company, categories=COMPANIES)
+    df = df.sort_values("Company", kind="stable").reset_index(drop=True)
+    df["Slug"] = df.Title.map(slugify)
+
     # Adjust for inflation
-    cpi = pd.read_excel("../data/cpi.xlsx", names=["Year", "CPI"])
-    pixar.loc[:, 'Opening_Weekend_USA_Adjusted'] = pixar.apply(lambda row: 
-                                                               adjust_for_inflation(row, cpi,
-                                                                                    column="Opening_Weekend_USA"), 1)
-    disney.loc[:, 'Opening_Weekend_USA_Adjusted'] = disney.apply(lambda row: 
-                                                                 adjust_for_inflation(row, cpi,
-                                                                                      column="Opening_Weekend_USA"), 1)
-    total.loc[:, 'Opening_Weekend_USA_Adjusted'] = total.apply(lambda row: 
-                                                               adjust_for_inflation(row, cpi,
-                                                                                    column="Opening_Weekend_USA"), 1)
-
-    # Scale variables
-    pixar, disney, total = scale_variables([pixar, disney, total],
-                                           ["I_Audience_Rating", "R_Audience_Score", "R_Audience_Rating",
-                                            "R_Critic_Score", "R_Critic_Rating",
-                                            "Cumulative Worldwide Gross", "Opening_Weekend_USA",
-                                            "Opening_Weekend_USA_Adjusted", "Yearly_Votes"])
-    
-    # Extract seed score
-    pixar["Seed_Score"] = create_seed_score(pixar)
-    disney["Seed_Score"] = create_seed_score(disney)
-    total["Seed_Score"] = create_seed_score(total)
-    
-    return pixar, disney, total
+    adjusted = adjust_for_inflation(df, ["Opening_Weekend_USA"], target_year=target_year)
+    df = df.join(adjusted.add_suffix("_Adjusted"))
+    df = df.join(yearly_features(df, reference_year))
+
+    return df
+
+
+def studio_view(df, company):
+    """ Select the rows of a single studio as a positional slice of the company-sorted frame """
+    codes = df.Company.cat.codes.values
+    code = df.Company.cat.categories.get_loc(company)
+    start, stop = np.searchsorted(codes, [code, code + 1])
+    return df.iloc[start:stop]
+
+
+def overall_view(df):
+    """ All movies with the scores that were scaled over all movies under the regular column names """
+    studio_columns = [f"{column}_Scaled" for column in SCALED_COLUMNS] + ["Seed_Score"]
+    return df.drop(columns=studio_columns).rename(columns=lambda column: column[:-len("_All")]
+                                                  if column.endswith("_All") else column)
 
 
 def preprocess_imdb_data():
     """ Preprocess IMDB data
     
     Steps:
-        * Manually add missing/incorrect Opening Weekend USA Box Office figures 
+        * Manually add missing/incorrect figures from data/overrides.csv, e.g., Opening Weekend USA Box Office
             * Some opening weekends were limited to a selected number of theaters
             * Thus, the weekend afterwards needed to be manually added 
         * Clean data
@@ -76,95 +149,72 @@ def preprocess_imdb_data():
     
     """
     
-    # Titles
-    disney_movies, pixar_movies = load_disney(), load_pixar()
-
     # Clean raw imdb data
-    disney_df = clean_raw_data("disney", disney_movies)
-    pixar_df = clean_raw_data("pixar", pixar_movies)
+    titles = load_title_index()
+    disney_df = clean_raw_data("disney", titles)
+    pixar_df = clean_raw_data("pixar", titles)
+    titles.report()
 
     # Extract features from json columns
-    pixar_df, disney_df, total_df = extract_features(disney_df, pixar_df)
-    
-    # Some opening weekends were limited to a selected number of theaters
-    # Thus, the weekend afterwards needed to be manually added
-    disney_df.loc[disney_df.Title == "Frozen II", "Opening_Weekend_USA"] = 130_263_358
-    total_df.loc[total_df.Title == "Frozen II", "Opening_Weekend_USA"] = 130_263_358
-    
-    disney_df.loc[disney_df.Title == "Aladdin", "Opening_Weekend_USA"] = 19_200_000
-    total_df.loc[total_df.Title == "Aladdin", "Opening_Weekend_USA"] = 19_200_000
-    
-    disney_df.loc[disney_df.Title == "The Princess and the Frog", "Opening_Weekend_USA"] = 24_208_916
-    total_df.loc[total_df.Title == "The Princess and the Frog", "Opening_Weekend_USA"] = 24_208_916
-    
-    disney_df.loc[disney_df.Title == "Brother Bear", "Opening_Weekend_USA"] = 24_208_916
-    total_df.loc[total_df.Title == "Brother Bear", "Opening_Weekend_USA"] = 24_208_916
+    df = extract_features(disney_df, pixar_df)
     
-    disney_df.loc[disney_df.Title == "Atlantis: The Lost Empire", "Opening_Weekend_USA"] = 20_342_105
-    total_df.loc[total_df.Title == "Atlantis: The Lost Empire", "Opening_Weekend_USA"] = 20_342_105
+    # Manual corrections, e.g., opening weekends that were limited to a selected number of theaters
+    df = apply_overrides(df)
     
-    disney_df.loc[disney_df.Title == "The Hunchback of Notre Dame", "Opening_Weekend_USA"] = 21_037_414
-    total_df.loc[total_df.Title == "The Hunchback of Notre Dame", "Opening_Weekend_USA"] = 21_037_414
-    
-    pixar_df.loc[pixar_df.Title == "Monsters, Inc.", "Opening_Weekend_USA"] = 62_577_067
-    total_df.loc[total_df.Title == "Monsters, Inc.", "Opening_Weekend_USA"] = 62_577_067
-    
-    pixar_df.loc[pixar_df.Title == "Toy Story", "Opening_Weekend_USA"] = 29_000_000
-    total_df.loc[total_df.Title == "Toy Story", "Opening_Weekend_USA"] = 29_000_000
-    
-    pixar_df.loc[pixar_df.Title == "Finding Nemo", "Opening_Weekend_USA"] = 70_251_710
-    total_df.loc[total_df.Title == "Finding Nemo", "Opening_Weekend_USA"] = 70_251_710
-    
-    pixar_df.loc[pixar_df.Title == "Onward", "Opening_Weekend_USA"] = 39_119_861
-    total_df.loc[total_df.Title == "Onward", "Opening_Weekend_USA"] = 39_119_861
-    
-    return pixar_df, disney_df, total_df
+    return df
+
+
+def apply_overrides(df, path=OVERRIDES_PATH):
+    """ Apply the manual corrections of the override table in a single indexed update
+
+    The table has a row per correction with the Title, the Column to correct and its new Value.
+    Overrides of titles or columns that are not in df are reported.
+    """
+    overrides = pd.read_csv(path)
+    corrections = overrides.pivot(index="Title", columns="Column", values="Value")
+
+    df = df.set_index("Title")
+    matched = corrections.index.intersection(df.index)
+    unmatched = corrections.index.difference(df.index)
+    columns = corrections.columns.intersection(df.columns)
+    unknown = corrections.columns.difference(df.columns)
+    corrections = corrections.loc[matched, columns]
+    dtypes = {column: df[column].dtype for column in columns}
+    df.update(corrections)
+    df = df.astype(dtypes)
+
+    print(f"Applied {corrections.notna().sum().sum()} overrides for {len(matched)} titles")
+    if len(unmatched):
+        print(f"Overrides without a matching title: {', '.join(unmatched)}")
+    if len(unknown):
+        print(f"Overrides of unknown columns: {', '.join(unknown)}")
+
+    return df.reset_index()
 
 
 def preprocess_rotten_data():
     """ Preprocess RottenTomatoes data
     
     Steps:
-    * Change some titles to match the titles retrieved from Wikipedia
-    * Extract release date
+    * Match titles to the titles retrieved from Wikipedia (see titles.py and data/title_aliases.csv)
+    * Extract release year
     * Combine pixar and disney data
     
     """
     
     # Load raw data
-    disney_movies, pixar_movies = load_disney(), load_pixar()
-    disney = pd.read_csv("../data/RottenTomatoes/disney_raw.csv")
-    pixar = pd.read_csv("../data/RottenTomatoes/pixar_raw.csv")
+    titles = load_title_index()
+    disney = read_rotten("disney")
+    pixar = read_rotten("pixar")
     
     # Preprocess pixar
-    titles_to_keep = []
-    for pixar_movie in pixar_movies:
-        if pixar_movie in pixar.Title.values:
-            titles_to_keep.append(pixar_movie)
-        
-    pixar_mapping = {"WALL-E": "WALL·E"}
-    for title in titles_to_keep:
-        pixar_mapping[title] = title
-        
-    pixar.Title = pixar.Title.map(pixar_mapping)
+    pixar.Title = titles.map(pixar.Title, studio="Pixar")
     pixar = pixar.dropna(subset=['Title']).drop_duplicates(subset=["Title"])
+    pixar.Release_Date = pd.to_numeric(pixar.Release_Date.str.split(", ").str[-1], errors="coerce")
     pixar['Company'] = "Pixar"
     
     # Preprocess disney
-    titles_to_keep = []
-    for disney_movie in disney_movies:
-        if disney_movie in disney.Title.values:
-            titles_to_keep.append(disney_movie)
-
-    disney_mapping = {"Atlantis - The Lost Empire": "Atlantis: The Lost Empire",
-                      "Fun & Fancy Free":  "Fun and Fancy Free",
-                      "101 Dalmatians": "One Hundred and One Dalmatians",
-                      "Many Adventures of Winnie the Pooh": "The Many Adventures of Winnie the Pooh",
-                      "Wreck-it Ralph": "Wreck-It Ralph"}
-    for title in titles_to_keep:
-        disney_mapping[title] = title
-        
-    disney.Title = disney.Title.map(disney_mapping)
+    disney.Title = titles.map(disney.Title, studio="Disney")
     disney.Release_Date = disney.apply(lambda row: str(row.Release_Date).split(", ")[-1] if isinstance(row.Release_Date, str)
                                        else None, 1)
     disney = disney.dropna(subset=['Release_Date'])
@@ -172,151 +222,226 @@ def preprocess_rotten_data():
     disney = disney.sort_values("Release_Date")
     disney = disney.dropna(subset=['Title']).drop_duplicates(subset=["Title"])
     disney['Company'] = "Disney"
+    titles.report()
     
     # combine datasets
-    total = disney.append(pixar[:])
-
-    return pixar, disney, total
+    return pd.concat([disney, pixar])
     
 
-def clean_raw_data(studio, movies):
-    df = pd.read_csv(f"../data/IMDB/imdb_{studio}_raw.csv")
+IMDB_COLUMNS = ["Title", "Genres", "Box office", "Rating", "Votes", "Year", "Kind"]
+
+
+def clean_raw_data(studio, titles):
+    """ Keep the animated IMDb movies of a studio that match a catalog title in the TitleIndex """
+    df = read_imdb(studio, columns=IMDB_COLUMNS)
     df_clean = df.copy()
     df_clean = df_clean.loc[df_clean.Kind == "movie", :]
     df_clean = df_clean[df_clean['Genres'].apply(lambda x: 'Animation' in x)]
-    df_clean = df_clean[df_clean.Title.isin(movies)]
+    df_clean["Title"] = titles.map(df_clean.Title, studio=studio.capitalize(), years=df_clean.Year)
+    df_clean = df_clean.dropna(subset=["Title"])
     df_clean = df_clean.sort_values("Year").drop_duplicates("Title")
 
     return df_clean
 
 
-def extract_budget(row):
-    """ Extract budget from json string """
-    
-    box_office = row["Box office"]
-    if isinstance(box_office, str):
-        box_office = box_office.replace("\'", "\"")
-        box_office = json.loads(box_office)
-        
-        if box_office.get("Budget"):
-            return int(re.sub("[^0-9]", "", box_office.get("Budget")))
-        
-    return None
-
-
-def extract_gross(row):
-    """ Extract Cumulative Worldwide Gross from json string """
-    
-    box_office = row["Box office"]
-    if isinstance(box_office, str):
-        box_office = box_office.replace("\'", "\"")
-        box_office = json.loads(box_office)
-        
-        if box_office.get("Cumulative Worldwide Gross"):
-            return int(re.sub("[^0-9]", "", box_office.get("Cumulative Worldwide Gross").split(" ")[0]))
-        
-    return None
-
-
-def extract_opening_weekend(row):
-    """ Extract Opening Weekend United States from json string """
-    
-    box_office = row["Box office"]
-    if isinstance(box_office, str):
-        box_office = box_office.replace("\'", "\"")
-        box_office = json.loads(box_office)
-        
-        if box_office.get("Opening Weekend United States"):
-            return int(re.sub("[^0-9]", "", box_office.get("Opening Weekend United States").split(" ")[0]))
-        
-    return None
-
-
-def normalize(df: pd.DataFrame, column: str):
-    """ Normalize between 0 and 1"""
+BOX_OFFICE_COLUMNS = {"Budget": "Budget",
+                      "Cumulative Worldwide Gross": "Cumulative Worldwide Gross",
+                      "Opening Weekend United States": "Opening_Weekend_USA"}
+
+
+def parse_box_office(box_office: pd.Series):
+    """ Extract all monetary fields from the box office strings in a single pass
+
+    Every distinct box office string is decoded exactly once with ast.literal_eval,
+    after which the amounts are extracted with vectorized string operations.
+    Only the first token of the gross and opening weekend is used, as those
+    are followed by a date (e.g., '$7,514,749, 17 Jul 1987').
+    """
+    decoded = {text: ast.literal_eval(text) for text in box_office.dropna().unique() if isinstance(text, str)}
+    fields = pd.DataFrame([decoded.get(text) or {} for text in box_office], index=box_office.index)
+    fields = fields.reindex(columns=list(BOX_OFFICE_COLUMNS))
+
+    amounts = pd.DataFrame(index=box_office.index)
+    for field, column in BOX_OFFICE_COLUMNS.items():
+        values = fields[field].astype("string")
+        if field != "Budget":
+            values = values.str.split(" ").str[0]
+        values = values.str.replace("[^0-9]", "", regex=True)
+        amounts[column] = pd.to_numeric(values.mask(values.str.len().fillna(0) == 0)).astype("Int64")
+
+    return amounts
+
+
+def fit_normalizer(values: pd.Series):
+    """ Fit the normalization of a column between 0 and 1
+
+    Returns the fitted parameters together with the normalized values
+    """
     
     # Fill the empty columns with the lowest value found in the respective column
-    values = df[column].fillna(min(df[column])).values.reshape(-1, 1)
-    values[values == np.inf] = min(df[column])
+    index = values.index
+    values = values.astype(float)
+    lowest = values.min()
+    values = values.fillna(lowest).replace(np.inf, lowest).values
     
-    # Give the lowest 3 values the same value
+    # Give the highest 3 values the same value
     # To create a nicer distribution which enhances nuances between ratings
-    ind = np.argpartition(np.array(values).flatten(), -3)[-3:]
-    values[ind] = max(values[ind])
+    ind = np.argpartition(values, -3)[-3:]
+    threshold, peak = min(values[ind]), max(values[ind])
+    values[ind] = peak
 
-    box = boxcox(values)
-    values = box[0]
-    
-    min_max_scaler = preprocessing.MinMaxScaler()
-    values_scaled = min_max_scaler.fit_transform(values)
-    values_scaled = values_scaled.reshape(1, -1).flatten()
-    values_scaled = [round(val, 2) for val in values_scaled]
-    return values_scaled
+    values, lmbda = boxcox(values)
+    params = {"lowest": lowest, "threshold": threshold, "peak": peak,
+              "lmbda": lmbda, "min": values.min(), "max": values.max()}
+    params = {key: float(value) for key, value in params.items()}
 
+    values_scaled = (values - params["min"]) / (params["max"] - params["min"])
+    return params, pd.Series(np.round(values_scaled, 2), index=index)
 
-def scale_variables(dfs: list, columns: list):
-    """ Normalize multiple columns in multiple dataframes """
-    new_dfs = []
-    
-    for df in dfs:
-        for column in columns:
-            df.loc[:, f"{column}_Scaled"] = normalize(df, column)
-        new_dfs.append(df)
-    
-    return tuple(new_dfs)
+
+def transform_normalizer(values: pd.Series, params: dict):
+    """ Normalize a column with previously fitted parameters
+
+    Values outside of the fitted range are clipped, so new titles are scored between 0 and 1.
+    New values that reach the threshold of the top 3 values are given the fitted peak.
+    """
+    values = values.astype(float).fillna(params["lowest"]).replace(np.inf, params["lowest"])
+    values = values.clip(lower=params["lowest"])
+    values[values >= params["threshold"]] = params["peak"]
+
+    values = boxcox(values.values, params["lmbda"])
+    values_scaled = np.clip((values - params["min"]) / (params["max"] - params["min"]), 0, 1)
+    return np.round(values_scaled, 2)
+
+
+def normalize(values: pd.Series):
+    """ Normalize between 0 and 1"""
+    return fit_normalizer(values)[1]
+
+
+def scale_variables(df: pd.DataFrame, columns: list, by=None):
+    """ Normalize multiple columns, within each group of `by` if given
+
+    Returns the scaled columns and the fitted parameters of each group ("All" without `by`) and column
+    """
+    keys = df[by] if by else pd.Series("All", index=df.index)
+    groups = df.groupby(keys, observed=True)
+    scalers = {name: {} for name in groups.groups}
+
+    def fit(values, column):
+        # The groups of a grouped transform are named after their key
+        scalers[values.name][column], scaled = fit_normalizer(values)
+        return scaled
+
+    scaled = pd.DataFrame({f"{column}_Scaled": groups[column].transform(fit, column) for column in columns})
+    return scaled, scalers
+
+
+def save_fitted(scalers: dict, df: pd.DataFrame, params: dict,
+                path=SCALERS_PATH, scores_path=FITTED_SCORES_PATH):
+    """ Save the fitted normalization parameters (with the parameters they were fitted with) and scores """
+    with open(path, "w") as f:
+        json.dump({"params": params, "scalers": scalers}, f, indent=2)
+    df.loc[:, ["Title"] + score_columns()].to_csv(scores_path, index=False)
+
+
+def load_fitted(params: dict, path=SCALERS_PATH, scores_path=FITTED_SCORES_PATH):
+    """ Load the fitted normalization parameters and scores, None if they were not fitted with params """
+    if not (os.path.exists(path) and os.path.exists(scores_path)):
+        return None
+    with open(path) as f:
+        fitted = json.load(f)
+    if fitted["params"] != params:
+        return None
+    return fitted["scalers"], pd.read_csv(scores_path, index_col="Title", float_precision="round_trip")
+
+
+def load_scalers(path=SCALERS_PATH):
+    """ Load the fitted normalization parameters """
+    with open(path) as f:
+        return json.load(f)["scalers"]
+
+
+def score_new_titles(df: pd.DataFrame, path=SCALERS_PATH, scalers=None):
+    """ Scale and seed new titles with the stored parameters of the last refit
+
+    The existing titles and their seeds are left untouched and the cost only depends
+    on the number of new titles. The rows need the (unscaled) columns that
+    `build_features` creates; refit with `combine_rotten_and_imdb(refit=True)`.
+    """
+    scalers = scalers or load_scalers(path)
+    df = df.copy()
+
+    for company, rows in df.groupby("Company", observed=True).groups.items():
+        for column in SCALED_COLUMNS:
+            df.loc[rows, f"{column}_Scaled"] = transform_normalizer(df.loc[rows, column], scalers[company][column])
+    df["Seed_Score"] = create_seed_score(df)
+
+    for column in SCALED_COLUMNS:
+        df[f"{column}_Scaled_All"] = transform_normalizer(df[column], scalers["All"][column])
+    df["Seed_Score_All"] = create_seed_score(df, suffix="_Scaled_All")
+
+    return df
 
 
 def extract_features(disney, pixar):
     """ Extract and create features from disney and pixar data """
-    disney["Budget"] = disney.apply(lambda row: extract_budget(row), 1)
-    disney["Cumulative Worldwide Gross"] = disney.apply(lambda row: extract_gross(row), 1)
-    disney["Opening_Weekend_USA"] = disney.apply(lambda row: extract_opening_weekend(row), 1)
-    disney["Company"] = "Disney"
-    disney["Yearly_Gross"] = disney.apply(lambda row: row["Cumulative Worldwide Gross"] / (2021 - row["Year"]) if row["Year"] >= 2010
-                                          else row["Cumulative Worldwide Gross"] / (2021 - 2010), 1)
-    disney["Yearly_Votes"] = disney.apply(lambda row: row["Votes"] / (2021 - row["Year"]) if row["Year"] >= 2010 
-                                          else row["Votes"] / (2021 - 2010), 1)
-
-    pixar["Budget"] = pixar.apply(lambda row: extract_budget(row), 1)
-    pixar["Cumulative Worldwide Gross"] = pixar.apply(lambda row: extract_gross(row), 1)
-    pixar["Opening_Weekend_USA"] = pixar.apply(lambda row: extract_opening_weekend(row), 1)
-    pixar["Company"] = "Pixar"
-    pixar["Yearly_Gross"] = pixar.apply(lambda row: row["Cumulative Worldwide Gross"] / (2021 - row["Year"]) if row["Year"] >= 2010
-                                        else row["Cumulative Worldwide Gross"] / (2021 - 2010), 1)
-    pixar["Yearly_Votes"] = pixar.apply(lambda row: row["Votes"] / (2021 - row["Year"]) if row["Year"] >= 2010 
-                                        else row["Votes"] / (2021 - 2010), 1)
-
-    total = disney.append(pixar)
-    
-    return pixar, disney, total
+    df = pd.concat([disney.assign(Company="Disney"), pixar.assign(Company="Pixar")], ignore_index=True)
+    df = df.join(parse_box_office(df["Box office"]))
+    return df
+
+
+def yearly_features(df, reference_year=REFERENCE_YEAR, min_year=2010):
+    """ Normalize the YEARLY_FEATURES by the number of years between release and reference_year
+
+    Movies released before min_year are treated as if they were released in min_year,
+    so older movies are not favored for having had decades to collect votes.
+    Movies released in (or after) the reference year count as one year.
+    """
+    years = df["Year"].to_numpy(dtype=float, na_value=np.nan)
+    elapsed = np.maximum(reference_year - np.maximum(years, min_year), 1)
+    return pd.DataFrame({feature: df[column].to_numpy(dtype=float, na_value=np.nan) / elapsed
+                         for feature, column in YEARLY_FEATURES.items()}, index=df.index)
 
 
-def create_seed_score(df):
+def create_seed_score(df, suffix="_Scaled"):
     """ Create Seed Score by:
 
     Score_i = (IR_i) + ( (RAR_i + RAS_i + RCR_i + RCS_i) / 4 ) + ( (OpeningWeekend_i + YearlyVotes_i) / 2 )
 
     """
 
-    imdb_score = df["I_Audience_Rating_Scaled"]
-    rotten_score = (df["R_Audience_Score_Scaled"] +
-                    df["R_Audience_Rating_Scaled"] +
-                    df["R_Critic_Score_Scaled"] +
-                    df["R_Critic_Rating_Scaled"])/4
-    popular_score = (df["Opening_Weekend_USA_Adjusted_Scaled"]/2) + (df["Yearly_Votes_Scaled"]/2)
+    imdb_score = df[f"I_Audience_Rating{suffix}"]
+    rotten_score = (df[f"R_Audience_Score{suffix}"] +
+                    df[f"R_Audience_Rating{suffix}"] +
+                    df[f"R_Critic_Score{suffix}"] +
+                    df[f"R_Critic_Rating{suffix}"])/4
+    popular_score = (df[f"Opening_Weekend_USA_Adjusted{suffix}"]/2) + (df[f"Yearly_Votes{suffix}"]/2)
 
     return (imdb_score + rotten_score + popular_score) / 3
 
 
-def adjust_for_inflation(row, cpi, column=""):
-    """ Adjust a monetary value for inflation
+@lru_cache()
+def load_cpi():
+    """ Load the CPI table once as a series indexed by every year from the first to the last year """
+    cpi = read_cpi().set_index("Year").CPI
+    return cpi.reindex(range(cpi.index.min(), cpi.index.max() + 1)).interpolate()
+
+
+def adjust_for_inflation(df, columns, cpi=None, target_year=None):
+    """ Adjust monetary columns for inflation to the prices of target_year
     https://www.usinflationcalculator.com/inflation/consumer-price-index-and-annual-percent-changes-from-1913-to-2008/
+
+    The CPI of each row is looked up by its position in the year-indexed CPI array,
+    so all columns are adjusted with a single vectorized multiplication.
+    Rows without a (known) year are returned as NaN.
     """
-    value = row[column]
-    year = row["Year"]
-    cpi_movie = cpi.loc[cpi.Year == year, "CPI"].values[0]
-    cpi_2020 = cpi.CPI.iloc[-1]
-    
-    adjusted_value = (value * cpi_2020) / cpi_movie
-    
-    return adjusted_value
+    cpi = load_cpi() if cpi is None else cpi
+    target_year = cpi.index[-1] if target_year is None else target_year
+
+    years = df["Year"].to_numpy(dtype=float, na_value=np.nan)
+    known = (years >= cpi.index[0]) & (years <= cpi.index[-1])
+    cpi_movie = np.full(len(years), np.nan)
+    cpi_movie[known] = cpi.values[years[known].astype(int) - cpi.index[0]]
+
+    return df[columns].mul(cpi[target_year] / cpi_movie, axis=0)
@@ -1,81 +1,140 @@
-import requests
 import re
 import json
+from functools import partial
 from bs4 import BeautifulSoup
 from data import load_disney, load_pixar
+from scraping import (ResponseCache, RequestScheduler, fetch, run_concurrently,
+                      load_existing, stale_titles, merge_records, scrape_with_checkpoint)
 import pandas as pd
-import time
-
-
-def get_urls(movies, search_term):
-    """ Get all rottentomatoes urls that match the movie's name """
-    urls = []
-    for movie in movies:
-        print(movie)
-        movie = movie.replace(" ", "%20")
-        r = requests.get(f"https://www.rottentomatoes.com/search?search={movie}%20{search_term}")
-        soup = BeautifulSoup(r.text, "html.parser")
-        result = soup.find_all("script", id="movies-json")[0]
-        result = json.loads(str(result).split('type="application/json">')[1].split("</script>")[0])
-
-        if result["items"]:
-            for item in result["items"][:4]:
-                urls.append(item['url'])
-
-        else:
-            print("Empty...")
-            r = requests.get(f"https://www.rottentomatoes.com/search?search={movie}")
-            soup = BeautifulSoup(r.text, "html.parser")
-            result = soup.find_all("script", id="movies-json")[0]
-            result = json.loads(str(result).split('type="application/json">')[1].split("</script>")[0])
-
-            if result["items"]:
-                for item in result["items"][:4]:
-                    urls.append(item['url'])
-                    
+
+
+RAW_PATH = "../data/RottenTomatoes/{}_raw_new.csv"
+CHECKPOINT_PATH = "../data/cache/rotten_{}.jsonl"
+COLUMNS = ["Title", "Audience_Score", "Audience_Rating", "Audience_Count",
+           "Critic_Score", "Critic_Rating", "Release_Date", "Query"]
+
+
+def get_urls(movies, search_term, scheduler=None, max_workers=8, cache=None):
+    """ Get all rottentomatoes urls that match the movie's name
+
+    Returns a dictionary that maps each url to the movie it was found for
+    """
+    scheduler = scheduler or RequestScheduler(pool_size=max_workers)
+    results = run_concurrently(partial(search_movie, scheduler, search_term=search_term, cache=cache),
+                               movies, max_workers)
+    urls = {}
+    for movie, movie_urls in zip(movies, results):
+        for url in movie_urls:
+            urls.setdefault(url, movie)
     return urls
 
 
-def get_movie_data(urls):
-    """ Get movie data based on a RottenTomatoes url """
-    df = pd.DataFrame(columns=["Title", "Audience_Score", "Audience_Rating", "Audience_Count", 
-                           "Critic_Score", "Critic_Rating", "Release_Date"])
-    
-    for url in urls:
-        print(url)
-        r = requests.get(url)
-        soup = BeautifulSoup(r.text, "html.parser")
-        result = soup.find_all("script", type="text/javascript")
-        result = json.loads(str(result[0]).split("root.RottenTomatoes.context.scoreBoardViewModel = ")[1].split("\n")[0].replace(";", ""))
-
-        # Get Data
-        title = result.get("critics").get("title")
-        audience_score = result.get("audience").get("score")
-        audience_rating = result.get("audience").get("averageRating")
-        audience_count = result.get("audience").get("ratingCount")
-
-        critic_score = result.get("critics").get("score")
-        critic_rating = result.get("critics").get("avgScore")
-
-        release_date = result.get("releaseDate")
-
-        df.loc[len(df)] = [title, audience_score, audience_rating, audience_count,
-                           critic_score, critic_rating, release_date]
-        time.sleep(1)
-        
+def search_movie(scheduler, movie, search_term, cache=None):
+    """ Search RottenTomatoes for a single movie and return the urls of the first 4 results """
+    print(movie)
+    movie = movie.replace(" ", "%20")
+    items = fetch(scheduler, f"https://www.rottentomatoes.com/search?search={movie}%20{search_term}",
+                  parse_search_results, cache)
+
+    if not items:
+        print("Empty...")
+        items = fetch(scheduler, f"https://www.rottentomatoes.com/search?search={movie}",
+                      parse_search_results, cache) or []
+
+    return [item['url'] for item in items[:4]]
+
+
+def parse_search_results(html):
+    """ Extract the search results from the movies-json script tag """
+    soup = BeautifulSoup(html, "html.parser")
+    result = soup.find_all("script", id="movies-json")[0]
+    result = json.loads(str(result).split('type="application/json">')[1].split("</script>")[0])
+    return result["items"]
+
+
+def get_movie_data(urls, scheduler=None, max_workers=8, cache=None):
+    """ Get movie data based on RottenTomatoes urls
+
+    `urls` is either a list of urls or a dictionary that maps each url to the movie it was found for
+    """
+    if not isinstance(urls, dict):
+        urls = dict.fromkeys(urls)
+
+    scheduler = scheduler or RequestScheduler(pool_size=max_workers)
+    rows = run_concurrently(partial(get_single_movie, scheduler, cache=cache), urls, max_workers)
+    rows = [row + [urls[url]] for url, row in zip(urls, rows) if row is not None]
+    df = pd.DataFrame(rows, columns=COLUMNS)
     return df
 
 
-def scrape(save=True):
-    """ Scrape Pixar and Disney movies from RottenTomatoes """
-    disney, pixar = load_disney(), load_pixar()
-    disney_urls = get_urls(disney, "disney")
-    pixar_urls = get_urls(pixar, "disney")
-    pixar_data = get_movie_data(pixar_urls)
-    disney_data = get_movie_data(disney_urls)
+def scrape_movie(scheduler, movie, search_term, cache=None):
+    """ Search a single movie and get the data of all of its search results """
+    rows = [get_single_movie(scheduler, url, cache) for url in search_movie(scheduler, movie, search_term, cache)]
+    return [row + [movie] for row in rows if row is not None]
+
+
+def get_single_movie(scheduler, url, cache=None):
+    """ Get the score board of a single RottenTomatoes movie page """
+    print(url)
+    return fetch(scheduler, url, parse_score_board, cache)
+
+
+def parse_score_board(html):
+    """ Extract the movie data from the score board of a movie page """
+    soup = BeautifulSoup(html, "html.parser")
+    result = soup.find_all("script", type="text/javascript")
+    result = json.loads(str(result[0]).split("root.RottenTomatoes.context.scoreBoardViewModel = ")[1].split("\n")[0].replace(";", ""))
+
+    # Get Data
+    title = result.get("critics").get("title")
+    audience_score = result.get("audience").get("score")
+    audience_rating = result.get("audience").get("averageRating")
+    audience_count = result.get("audience").get("ratingCount")
+
+    critic_score = result.get("critics").get("score")
+    critic_rating = result.get("critics").get("avgScore")
+
+    release_date = result.get("releaseDate")
+
+    return [title, audience_score, audience_rating, audience_count,
+            critic_score, critic_rating, release_date]
+
+
+def scrape(save=True, max_workers=8, cache=None, incremental=False, max_age_days=None, scheduler=None):
+    """ Scrape Pixar and Disney movies from RottenTomatoes
+
+    All requests go through a shared scheduler that rate limits every host, retries
+    transient failures and keeps at most `max_workers` requests in flight.
+    Pages are served from the on-disk response cache when possible, use
+    `cache=ResponseCache(offline=True)` to scrape without network access.
+
+    Rows are streamed to a checkpoint in data/cache, so an interrupted scrape
+    continues with the titles it did not finish yet.
+
+    In incremental mode only the titles that are missing from the previously saved
+    raw data, or that were scraped more than `max_age_days` ago, are fetched and
+    merged back into the existing data.
+    """
+    scheduler = scheduler or RequestScheduler(pool_size=max_workers)
+    cache = cache or ResponseCache()
+    disney_data = scrape_studio("disney", load_disney(), scheduler, max_workers, cache, incremental, max_age_days)
+    pixar_data = scrape_studio("pixar", load_pixar(), scheduler, max_workers, cache, incremental, max_age_days)
+    scheduler.report()
 
     if save:
-        disney_data.to_csv("../data/RottenTomatoes/disney_raw_new.csv", index=False)
-        pixar_data.to_csv("../data/RottenTomatoes/pixar_raw_new.csv", index=False)
+        disney_data.to_csv(RAW_PATH.format("disney"), index=False)
+        pixar_data.to_csv(RAW_PATH.format("pixar"), index=False)
         
-    return disney_data, pixar_data
\ No newline at end of file
+    return disney_data, pixar_data
+
+
+def scrape_studio(studio, movies, scheduler, max_workers, cache, incremental=False, max_age_days=None):
+    """ Scrape the (stale) movies of a single studio and merge them with the existing data """
+    existing = load_existing(RAW_PATH.format(studio)) if incremental else None
+    titles = stale_titles(existing, movies, max_age_days)
+    if existing is not None and not titles:
+        return existing
+
+    data = scrape_with_checkpoint(partial(scrape_movie, scheduler, search_term="disney", cache=cache),
+                                  titles, COLUMNS, CHECKPOINT_PATH.format(studio), max_workers)
+    return merge_records(existing, data, titles)
@@ -0,0 +1,435 @@
+import os
+import json
+import time
+import random
+import zlib
+import sqlite3
+import hashlib
+import threading
+import requests
+import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ResponseCache:
+    """ Persistent, content-addressed cache for scraped responses
+
+    Responses are stored as compressed blobs in a SQLite database keyed by the
+    hash of their url (or any other key such as an IMDB movieID). Entries expire
+    after `ttl` seconds and the least recently used entries are evicted once the
+    cache grows beyond `max_size` bytes. In offline mode expired entries are still
+    served and nothing is ever fetched from the network.
+    """
+    def __init__(self, path="../data/cache/responses.sqlite", ttl=7 * 24 * 60 * 60,
+                 max_size=500 * 1024 * 1024, offline=False):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.offline = offline
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses "
+                         "(hash TEXT PRIMARY KEY, key TEXT, value BLOB, size INTEGER, created REAL, accessed REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._db.commit()
+
+    def get(self, key):
+        """ Return the cached value of key or None if it is missing or expired """
+        digest = hash_key(key)
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM responses WHERE hash = ?", (digest,)).fetchone()
+            if row is None:
+                return None
+
+            value, created = row
+            if not self.offline and time.time() - created > self.ttl:
+                return None
+
+            self._db.execute("UPDATE responses SET accessed = ? WHERE hash = ?", (time.time(), digest))
+            self._db.commit()
+
+        return json.loads(zlib.decompress(value))
+
+    def set(self, key, value):
+        """ Store a json serializable value and evict the least recently used entries if needed """
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._db.execute("REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                             (hash_key(key), key, blob, len(blob), now, now))
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """ Remove the least recently used entries until the cache fits in max_size """
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size:
+            return
+
+        rows = self._db.execute("SELECT hash, size FROM responses ORDER BY accessed").fetchall()
+        for digest, size in rows:
+            if total <= self.max_size:
+                break
+            self._db.execute("DELETE FROM responses WHERE hash = ?", (digest,))
+            total -= size
+
+
+def hash_key(key):
+    """ Content address of a cache key """
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def cached_call(cache, key, func, *args, **kwargs):
+    """ Return the cached value of key or compute, cache and return func(*args, **kwargs)
+
+    Returns None when the cache is offline and the key was never cached
+    """
+    if cache is not None:
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        if cache.offline:
+            print(f"Not cached: {key}")
+            return None
+
+    value = func(*args, **kwargs)
+
+    if cache is not None and value is not None:
+        cache.set(key, value)
+
+    return value
+
+
+def create_session(pool_size=8):
+    """ Create a single pooled HTTP session that is shared between all scraping threads """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class TransientError(Exception):
+    """ A failure that is worth retrying, such as a rate limit, server error or truncated page """
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Connection problems and truncated or corrupted responses are retried as well
+TRANSIENT_ERRORS = (TransientError, requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError)
+
+
+class TokenBucket:
+    """ Allow on average `rate` requests per second with bursts of at most `burst` requests """
+    def __init__(self, rate=2.0, burst=4):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """ Take a token, sleeping until one is available, and return the time spent waiting """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class RequestScheduler:
+    """ Shared request scheduler for the scrapers
+
+    Every host gets its own token bucket and transient failures are retried with
+    jittered exponential backoff. Requests that keep failing, or fail with a
+    non-transient HTTP error, return None instead of aborting the scrape. Any other
+    exception (e.g., a bug in func) is raised. The number of requests, retries,
+    failures and the time spent waiting are counted in `stats`.
+    """
+    def __init__(self, rate=2.0, burst=4, max_retries=4, backoff=1.0, max_backoff=60.0,
+                 timeout=30, session=None, pool_size=8):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.session = session or create_session(pool_size)
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "wait_time": 0.0}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def call(self, host, func, args=(), transient=()):
+        """ Call func(*args) at the rate of host and retry the transient exceptions """
+        for attempt in range(self.max_retries + 1):
+            self._count("wait_time", self._bucket(host).acquire())
+            self._count("requests")
+
+            try:
+                return func(*args)
+            except TRANSIENT_ERRORS + tuple(transient) as e:
+                if attempt == self.max_retries:
+                    print(f"Failed after {attempt + 1} attempts: {e}")
+                    self._count("failures")
+                    return None
+
+                self._count("retries")
+                self._count("wait_time", self._sleep(attempt, getattr(e, "retry_after", None)))
+            except requests.HTTPError as e:
+                print(f"Failed: {e}")
+                self._count("failures")
+                return None
+
+    def get(self, url, parse=None):
+        """ Get a url and return its text together with the parsed text
+
+        Pages that cannot be parsed are retried, as they are usually truncated or rate limited responses
+        """
+        def request():
+            r = self.session.get(url, timeout=self.timeout)
+            if r.status_code == 429 or r.status_code >= 500:
+                retry_after = r.headers.get("Retry-After")
+                retry_after = float(retry_after) if retry_after and retry_after.isdigit() else None
+                raise TransientError(f"{r.status_code} for {url}", retry_after)
+            r.raise_for_status()
+
+            if parse is None:
+                return r.text, r.text
+
+            try:
+                return r.text, parse(r.text)
+            except Exception as e:
+                raise TransientError(f"Could not parse {url} ({e!r})")
+
+        return self.call(urlparse(url).netloc, request)
+
+    def report(self):
+        """ Print a summary of the scheduled requests """
+        print(f"{self.stats['requests']} requests, {self.stats['retries']} retries, "
+              f"{self.stats['failures']} failures, {self.stats['wait_time']:.1f}s waiting")
+
+    def _bucket(self, host):
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+    def _sleep(self, attempt, retry_after=None):
+        """ Sleep with full jitter exponential backoff, or as long as the server asked us to """
+        wait = retry_after or random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        time.sleep(wait)
+        return wait
+
+    def _count(self, key, value=1):
+        with self._lock:
+            self.stats[key] += value
+
+
+def fetch(scheduler, url, parse=None, cache=None):
+    """ Get and parse a url through the scheduler, optionally served from the response cache
+
+    The raw text is cached, so parsers can be changed without scraping again.
+    Returns None if the url could not be fetched or, in offline mode, was never cached.
+    """
+    if cache is not None:
+        text = cache.get(url)
+        if text is not None:
+            try:
+                return parse(text) if parse else text
+            except Exception:
+                print(f"Could not parse cached {url}")
+                if cache.offline:
+                    return None
+
+        elif cache.offline:
+            print(f"Not cached: {url}")
+            return None
+
+    result = scheduler.get(url, parse)
+    if result is None:
+        return None
+
+    text, parsed = result
+    if cache is not None:
+        cache.set(url, text)
+
+    return parsed
+
+
+def run_concurrently(func, items, max_workers=8):
+    """ Apply func to every item with a bounded thread pool
+
+    The results are returned in the same order as the input items
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(func, items))
+
+
+class CheckpointWriter:
+    """ Append-only JSONL output of scraped rows with a resume checkpoint
+
+    Rows are buffered and flushed in batches, so memory stays flat during a scrape.
+    The keys (catalog titles) of all flushed rows are appended to a checkpoint file
+    after their rows are written, which lets an interrupted scrape skip every
+    title that already made it to disk. Rows of keys that were written but never
+    checkpointed (a crash between the two writes) are dropped when a scrape resumes.
+    """
+    def __init__(self, path, columns, batch_size=25, key_column="Query"):
+        self.path = path
+        self.checkpoint_path = f"{path}.done"
+        self.columns = columns
+        self.batch_size = batch_size
+        self.key_column = key_column
+        self._buffer = []
+        self._keys = []
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.done = set()
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                self.done = {line.rstrip("\n") for line in f if line.strip()}
+        self._discard_unchecked()
+
+    def write(self, key, rows):
+        """ Buffer the rows of a key and flush when the batch is full """
+        with self._lock:
+            self._buffer.extend(rows)
+            self._keys.append(key)
+            if len(self._keys) >= self.batch_size:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        """ Write the buffered rows before checkpointing their keys """
+        if not self._keys:
+            return
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            for row in self._buffer:
+                f.write(json.dumps(dict(zip(self.columns, row)), default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{key}\n" for key in self._keys))
+
+        self.done.update(self._keys)
+        self._buffer, self._keys = [], []
+
+    def read(self):
+        """ Read all checkpointed rows """
+        df = pd.DataFrame(self._records(), columns=self.columns)
+        return df.loc[df[self.key_column].isin(self.done), :].reset_index(drop=True)
+
+    def _records(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _discard_unchecked(self):
+        """ Rewrite the output with only the rows of checkpointed keys, they are scraped again """
+        records = self._records()
+        kept = [record for record in records if record[self.key_column] in self.done]
+        if len(kept) == len(records):
+            return
+
+        with open(f"{self.path}.tmp", "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in kept))
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def clear(self):
+        """ Remove the output and checkpoint once the scrape is finished """
+        for path in [self.path, self.checkpoint_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def scrape_with_checkpoint(func, titles, columns, path, max_workers=8, batch_size=25):
+    """ Scrape func(title) -> rows for every title with batched, checkpointed writes
+
+    Titles that were checkpointed by an earlier, interrupted run are skipped.
+    The rows need to end with the title they were scraped for (the Query column).
+    """
+    writer = CheckpointWriter(path, columns, batch_size)
+    todo = [title for title in titles if title not in writer.done]
+    if len(todo) < len(titles):
+        print(f"Resuming: {len(titles) - len(todo)} titles were already scraped")
+
+    try:
+        run_concurrently(lambda title: writer.write(title, func(title)), todo, max_workers)
+    finally:
+        # Checkpoint the finished titles of a partial batch, also when the scrape failed or was interrupted
+        writer.flush()
+
+    # Restore the catalog order of the concurrently scraped rows
+    order = {title: index for index, title in enumerate(titles)}
+    df = writer.read().sort_values("Query", key=lambda queries: queries.map(order), kind="stable")
+    writer.clear()
+    return df.reset_index(drop=True)
+
+
+def load_existing(path):
+    """ Load previously scraped raw data or None if it was never saved """
+    if not os.path.exists(path):
+        return None
+
+    df = pd.read_csv(path, dtype={"ID": str})
+    return df.loc[:, ~df.columns.str.startswith("Unnamed")]
+
+
+def get_queries(df):
+    """ The catalog title each row was scraped for
+
+    Rows saved before the Query column existed fall back to their scraped title
+    """
+    if "Query" in df.columns:
+        return df.Query.fillna(df.Title)
+    return df.Title
+
+
+def stale_titles(existing, titles, max_age_days=None):
+    """ Return the titles that are missing from the existing data or were scraped more than max_age_days ago
+
+    Rows without a scrape date only count as stale when max_age_days is given
+    """
+    if existing is None or len(existing) == 0:
+        return list(titles)
+
+    queries = get_queries(existing)
+    if max_age_days is not None:
+        scraped_at = pd.to_datetime(existing.get("Scraped_At", pd.Series(index=existing.index, dtype=object)),
+                                    errors="coerce")
+        queries = queries[scraped_at >= pd.Timestamp.now() - pd.Timedelta(days=max_age_days)]
+
+    fresh = set(queries.values)
+    return [title for title in titles if title not in fresh]
+
+
+def merge_records(existing, new, titles):
+    """ Replace the rows of the refreshed titles in the existing data by the newly scraped rows """
+    new = new.assign(Scraped_At=pd.Timestamp.now().isoformat(timespec="seconds"))
+    if existing is None:
+        return new.reset_index(drop=True)
+
+    existing = existing.assign(Query=get_queries(existing))
+    existing = existing.loc[~existing.Query.isin(titles), :]
+    return pd.concat([existing, new], ignore_index=True)
@@ -0,0 +1,143 @@
+import os
+import math
+from PIL import Image, ImageDraw
+from assets import template, load_template
+
+
+TILE_SIZE = 512
+
+
+def new_poster(template_name, scale=1, tiled=False):
+    """ Return a poster to draw on and the object to draw with
+
+    By default this is a copy of the template and its ImageDraw. A tiled poster records
+    the drawing operations instead and renders them tile by tile, see `TiledPoster`.
+    """
+    if tiled:
+        poster = TiledPoster(template_name, scale)
+        return poster, poster
+
+    pattern = template(template_name, scale)
+    return pattern, ImageDraw.Draw(pattern, 'RGBA')
+
+
+class TiledPoster:
+    """ A poster that is composed tile by tile
+
+    It supports the drawing operations the posters use, `paste(image, box, mask)` of
+    an Image and `bitmap(xy, bitmap, fill)` of an ImageDraw, but only records them with
+    their bounding boxes. When the poster is saved, every tile is cropped from the
+    shared template and only the operations that intersect the tile are replayed on it.
+    Memory therefore depends on the tile size instead of the poster size.
+
+    The tiles are pixel-identical to the same region of a poster that was drawn directly.
+    """
+    def __init__(self, template_name, scale=1):
+        self.background = load_template(template_name, scale)
+        self.size = self.background.size
+        self.operations = []
+
+    def paste(self, image, box, mask=None):
+        x, y = box[:2]
+        self.operations.append(("paste", (x, y, x + image.width, y + image.height), image, mask))
+
+    def bitmap(self, xy, bitmap, fill=None):
+        x, y = xy
+        self.operations.append(("bitmap", (x, y, x + bitmap.width, y + bitmap.height), bitmap, fill))
+
+    def grid(self, tile_size=TILE_SIZE):
+        """ The number of tile columns and rows """
+        return math.ceil(self.size[0] / tile_size), math.ceil(self.size[1] / tile_size)
+
+    def tiles(self, tile_size=TILE_SIZE):
+        """ Render the tiles row by row, yields the column, row and image of each tile """
+        columns, rows = self.grid(tile_size)
+
+        # Assign each operation to the tiles its bounding box intersects, in drawing order
+        buckets = {}
+        for index, (_, (left, top, right, bottom), _, _) in enumerate(self.operations):
+            for row in range(max(top // tile_size, 0), min((bottom - 1) // tile_size, rows - 1) + 1):
+                for column in range(max(left // tile_size, 0), min((right - 1) // tile_size, columns - 1) + 1):
+                    buckets.setdefault((column, row), []).append(index)
+
+        for row in range(rows):
+            for column in range(columns):
+                yield column, row, self.render_tile(column, row, tile_size, buckets.get((column, row), []))
+
+    def render_tile(self, column, row, tile_size, operations):
+        """ Crop a tile from the template and replay the operations that intersect it """
+        x, y = column * tile_size, row * tile_size
+        tile = self.background.crop((x, y, min(x + tile_size, self.size[0]), min(y + tile_size, self.size[1])))
+        draw = ImageDraw.Draw(tile, 'RGBA')
+
+        for index in operations:
+            kind, (left, top, _, _), image, option = self.operations[index]
+            if kind == "paste":
+                tile.paste(image, (left - x, top - y), mask=option)
+            else:
+                draw.bitmap((left - x, top - y), image, fill=option)
+
+        return tile
+
+    def save_tiles(self, directory, tile_size=TILE_SIZE, format="png"):
+        """ Stream the tiles to directory as {column}_{row}.{format} """
+        os.makedirs(directory, exist_ok=True)
+        for column, row, tile in self.tiles(tile_size):
+            tile.save(os.path.join(directory, f"{column}_{row}.{format}"))
+
+    def save_dzi(self, path, tile_size=TILE_SIZE, format="png"):
+        """ Save the poster as a Deep Zoom Image (path.dzi and its path_files pyramid)
+
+        The full resolution tiles are streamed to the highest level, every lower level
+        is built from 2x2 tiles of the level above it, so at most four tiles are in
+        memory at once. The pyramid can be opened by web zoom viewers like OpenSeadragon.
+        """
+        base, _ = os.path.splitext(path)
+        files = f"{base}_files"
+        max_level = math.ceil(math.log2(max(self.size))) if max(self.size) > 1 else 0
+
+        self.save_tiles(os.path.join(files, str(max_level)), tile_size, format)
+
+        width, height = self.size
+        for level in range(max_level - 1, -1, -1):
+            upper = os.path.join(files, str(level + 1))
+            directory = os.path.join(files, str(level))
+            os.makedirs(directory, exist_ok=True)
+
+            width, height = math.ceil(width / 2), math.ceil(height / 2)
+            for row in range(math.ceil(height / tile_size)):
+                for column in range(math.ceil(width / tile_size)):
+                    tile = merge_children(upper, column, row, tile_size, format)
+                    tile.save(os.path.join(directory, f"{column}_{row}.{format}"))
+
+        with open(path, "w") as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    f'<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" Format="{format}" '
+                    f'Overlap="0" TileSize="{tile_size}">\n'
+                    f'  <Size Width="{self.size[0]}" Height="{self.size[1]}"/>\n'
+                    '</Image>\n')
+
+    def to_image(self, tile_size=TILE_SIZE):
+        """ Assemble the full poster (this needs the memory of the full poster) """
+        image = Image.new('RGBA', self.size)
+        for column, row, tile in self.tiles(tile_size):
+            image.paste(tile, (column * tile_size, row * tile_size))
+        return image
+
+
+def merge_children(directory, column, row, tile_size, format="png"):
+    """ Downsample the (up to) 2x2 tiles in directory that make up a tile of the level below """
+    children = {}
+    for dx in (0, 1):
+        for dy in (0, 1):
+            child = os.path.join(directory, f"{2 * column + dx}_{2 * row + dy}.{format}")
+            if os.path.exists(child):
+                children[dx, dy] = Image.open(child)
+
+    width = sum(children[dx, 0].width for dx in (0, 1) if (dx, 0) in children)
+    height = sum(children[0, dy].height for dy in (0, 1) if (0, dy) in children)
+    merged = Image.new(children[0, 0].mode, (width, height))
+    for (dx, dy), child in children.items():
+        merged.paste(child, (dx * tile_size, dy * tile_size))
+
+    return merged.resize((math.ceil(width / 2), math.ceil(height / 2)), Image.ANTIALIAS)
@@ -0,0 +1,106 @@
+import re
+import unicodedata
+import pandas as pd
+from data import load_disney, load_pixar, TITLE_ALIASES_PATH, CATALOG_YEARS_PATH
+
+
+def title_key(title):
+    """ Normalize a title to a lookup key
+
+    Accents, case, punctuation, '&' vs 'and' and a leading 'The' are ignored, so
+    'WALL-E', 'WALL·E' and 'Wall E' or 'Atlantis - The Lost Empire' and
+    'Atlantis: The Lost Empire' share the same key.
+    """
+    title = unicodedata.normalize("NFKD", str(title)).encode("ascii", "ignore").decode("ascii")
+    title = title.casefold().replace("&", " and ")
+    title = re.sub(r"^\s*the\s+", "", title)
+    return re.sub(r"[^0-9a-z]", "", title)
+
+
+def slugify(title):
+    """ The file name (without extension) of the thumbnail of a title in images/thumbnails """
+    slug = (
+            title.lower()
+                 .replace("·", " ")
+                 .replace(",", " ")
+                 .replace(".", " ")
+                 .replace("'", " ")
+                 .strip()
+                 .replace("  ", " ")
+    )
+    return slug.replace("& ", "").replace(":", "").replace("-", " ")
+
+
+class TitleIndex:
+    """ Match scraped titles from any source to the titles of the catalog
+
+    The index is built once over the catalog and maps normalized title keys, and the
+    keys of known aliases, to catalog entries. Lookups take constant time. When a key
+    matches several entries the release year is used to pick one. Unmatched and
+    ambiguous lookups are collected for `report`.
+    """
+    def __init__(self, catalog, aliases=None):
+        self._entries = {}
+        self.catalog = [entry[0] for entry in catalog]
+        self.matched = set()
+        self.unmatched = set()
+        self.ambiguous = set()
+
+        for title, studio, year in catalog:
+            self._add(title_key(title), (title, studio, year))
+
+        for alias, title in (aliases or {}).items():
+            for entry in self._entries.get(title_key(title), []):
+                if entry[0] == title:
+                    self._add(title_key(alias), entry)
+
+    def _add(self, key, entry):
+        entries = self._entries.setdefault(key, [])
+        if entry not in entries:
+            entries.append(entry)
+
+    def resolve(self, title, studio=None, year=None):
+        """ Return the catalog title that matches title, or None """
+        entries = self._entries.get(title_key(title), [])
+        if studio is not None:
+            entries = [entry for entry in entries if entry[1] == studio]
+        if len(entries) > 1 and year is not None:
+            entries = [entry for entry in entries if entry[2] is None or abs(entry[2] - year) <= 1] or entries
+
+        if not entries:
+            self.unmatched.add(title)
+            return None
+        if len({entry[0] for entry in entries}) > 1:
+            self.ambiguous.add(title)
+            return None
+
+        self.matched.add(entries[0][0])
+        return entries[0][0]
+
+    def map(self, titles, studio=None, years=None):
+        """ Resolve a series of titles (with optional release years) """
+        years = [None] * len(titles) if years is None else years
+        resolved = [self.resolve(title, studio, None if pd.isna(year) else year)
+                    for title, year in zip(titles, years)]
+        return pd.Series(resolved, index=getattr(titles, "index", None), dtype=object)
+
+    def missing(self):
+        """ Catalog titles that none of the resolved titles matched """
+        return [title for title in self.catalog if title not in self.matched]
+
+    def report(self):
+        """ Print the ambiguous titles and the catalog titles without a match """
+        print(f"Matched {len(self.matched)} catalog titles, {len(self.unmatched)} titles are not in the catalog")
+        if self.ambiguous:
+            print(f"Ambiguous titles: {', '.join(sorted(map(str, self.ambiguous)))}")
+        if self.missing():
+            print(f"Catalog titles without a match: {', '.join(self.missing())}")
+
+
+def load_title_index():
+    """ Build the title index over the Disney and Pixar catalogs (with their release years) and the alias table """
+    years = pd.read_csv(CATALOG_YEARS_PATH).set_index("Title").Year.to_dict()
+    catalog = ([(title, "Disney", years.get(title)) for title in load_disney()] +
+               [(title, "Pixar", years.get(title)) for title in load_pixar()])
+    aliases = pd.read_csv(TITLE_ALIASES_PATH)
+    return TitleIndex(catalog, dict(zip(aliases.Alias, aliases.Title)))
@@ -0,0 +1,67 @@
+import os
+import sys
+import ast
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from imdb_scraper import CandidateResolver, COLUMNS  # noqa: E402
+
+
+RAW_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "IMDB", "imdb_disney_raw.csv")
+
+
+class StubResolver(CandidateResolver):
+    """ A resolver that serves the candidates of the committed raw scrape in their original order """
+    def __init__(self, raw):
+        super().__init__(max_workers=1)
+        self.raw = raw
+        self.fetched = []
+
+    def search(self, title):
+        candidates = self.raw.loc[self.raw.Title == title]
+        return [(movie_id, None if pd.isna(year) else int(year))
+                for movie_id, year in zip(candidates.ID, candidates.Year)]
+
+    def get_movie(self, movie_id):
+        self.fetched.append(movie_id)
+        row = self.raw.loc[self.raw.ID == movie_id].iloc[0]
+        record = {column: row[column] for column in COLUMNS}
+        record["Genres"] = ast.literal_eval(row["Genres"])
+        record["Companies"] = ast.literal_eval(row["Companies"])
+        return record
+
+
+def test_live_action_remakes_do_not_stop_the_search():
+    raw = pd.read_csv(RAW_PATH, dtype={"ID": str})
+
+    for title, year in [("Dumbo", 1941), ("Cinderella", 1950),
+                        ("Alice in Wonderland", 1951), ("Lady and the Tramp", 1955)]:
+        resolver = StubResolver(raw)
+        rows = resolver.resolve_movie(title, "Disney")
+        years = [row[COLUMNS.index("Year")] for row in rows]
+
+        # The live-action remake is listed first, the animated original must still be fetched
+        assert len(resolver.fetched) == 2
+        assert year in years
+
+
+def test_earlier_originals_are_checked_after_a_confirmed_remake():
+    raw = pd.read_csv(RAW_PATH, dtype={"ID": str})
+
+    for title, movie_id, year in [("The Lion King", "0110357", 1994), ("Chicken Little", "0035733", 1943)]:
+        resolver = StubResolver(raw)
+        rows = resolver.resolve_movie(title, "Disney")
+
+        # The (animated) remake is listed first and confirms the title, but the original is earlier
+        assert movie_id in resolver.fetched
+        assert year in [row[COLUMNS.index("Year")] for row in rows]
+
+
+def test_later_candidates_are_skipped_after_a_confirmation():
+    raw = pd.read_csv(RAW_PATH, dtype={"ID": str})
+    resolver = StubResolver(raw)
+    resolver.search = lambda title: [("0110357", 1994), ("6105098", 2019)]
+    resolver.resolve_movie("The Lion King", "Disney")
+
+    assert resolver.fetched == ["0110357"]